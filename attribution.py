@@ -0,0 +1,148 @@
+"""Exact per-patient feature attributions for the tree ensemble.
+
+Path-dependent TreeSHAP on the flattened arrays of a ``TreeEnsemble``:
+every root-to-leaf path is reduced to the distinct features it tests, with
+the input interval that follows the path (the "one fraction") and the
+share of training cover that follows it (the "zero fraction"). The
+Shapley value of feature i on one path is then
+
+    v * (o_i - z_i) * sum_S |S|! (d - |S| - 1)! / d! * prod_{j in S} o_j * prod_{j not in S, j != i} z_j
+
+over the subsets S of the path's other features, which is a polynomial in
+the o/z pairs and is evaluated for all paths and a batch of patients at
+once. Summed over paths and scaled by the learning rate, it gives exact
+SHAP values of the raw (log-odds) model output per class.
+"""
+import threading
+from collections import OrderedDict
+from math import factorial
+
+import numpy as np
+
+from model_registry import get_registry, load_model
+from tree_runtime import TreeEnsemble
+
+
+class TreeExplainer:
+    """SHAP values of a TreeEnsemble's raw output, vectorized over paths and patients.
+
+    ``shap_values(X)`` is N x n_features x n_classes and, with
+    ``expected_value``, adds up to ``ensemble.decision_function(X)``.
+    ``explain_one`` memoizes single feature vectors (float32-canonicalized,
+    like PredictionCache) in an LRU of ``maxsize`` entries.
+    """
+
+    def __init__(self, ensemble, maxsize=1024):
+        self.ensemble = ensemble
+        self.n_classes = len(ensemble.init_raw)
+        self.maxsize = maxsize
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._compile_paths()
+
+    def _compile_paths(self):
+        e = self.ensemble
+        depth = max(e.max_depth, 1)
+        leaves, features, lower, upper, zero = [], [], [], [], []
+        # depth-first over every tree, carrying the conditions of the path so far
+        stack = [(int(root), {}) for root in e.roots]
+        while stack:
+            node, path = stack.pop()
+            if e.left[node] == -1:
+                leaves.append(node)
+                items = sorted(path.items())
+                pad = depth - len(items)
+                features.append([f for f, _ in items] + [-1] * pad)
+                lower.append([c[0] for _, c in items] + [-np.inf] * pad)
+                upper.append([c[1] for _, c in items] + [np.inf] * pad)
+                zero.append([c[2] for _, c in items] + [1.0] * pad)
+                continue
+            f, t = int(e.feature[node]), float(e.threshold[node])
+            for child, goes_left in ((int(e.left[node]), True), (int(e.right[node]), False)):
+                lo, hi, z = path.get(f, (-np.inf, np.inf, 1.0))
+                lo, hi = (lo, min(hi, t)) if goes_left else (max(lo, t), hi)
+                child_path = dict(path)
+                child_path[f] = (lo, hi, z * e.cover[child] / e.cover[node])
+                stack.append((child, child_path))
+        leaves = np.array(leaves, dtype=np.intp)
+        self._feature = np.array(features, dtype=np.intp)
+        self._lower = np.array(lower)
+        self._upper = np.array(upper)
+        self._zero = np.array(zero)
+        self._used = self._feature != -1
+        n_used = self._used.sum(axis=1)
+        # weights[p, s]: |S|! (d - |S| - 1)! / d! for a path with d features, 0 past d - 1
+        self._weights = np.zeros((len(leaves), depth))
+        for p, d in enumerate(n_used):
+            for s in range(d):
+                self._weights[p, s] = factorial(s) * factorial(d - s - 1) / factorial(d)
+        tree_of_leaf = np.searchsorted(e.tree_offset, leaves, side='right') - 1
+        leaf_class = e.tree_class[tree_of_leaf]
+        self._value = e.value[leaves] * e.learning_rate
+        # sums the path slots into feature x class columns
+        columns = np.where(self._used, self._feature * self.n_classes + leaf_class[:, None], 0)
+        self._scatter = np.zeros((self._feature.size, e.n_features_in_ * self.n_classes))
+        self._scatter[np.arange(self._feature.size), columns.ravel()] = self._used.ravel()
+        # the model output with no feature known: cover-weighted mean of the leaves
+        reach = np.prod(self._zero, axis=1)
+        self.expected_value = e.init_raw + np.bincount(leaf_class, weights=reach * self._value, minlength=self.n_classes)
+
+    def shap_values(self, X, chunk_size=256):
+        X = self.ensemble._check_input(X)
+        out = np.empty((len(X), self.ensemble.n_features_in_, self.n_classes))
+        for start in range(0, len(X), chunk_size):
+            phi = self._path_shap(X[start:start + chunk_size])
+            out[start:start + chunk_size] = (phi.reshape(len(phi), -1) @ self._scatter).reshape(len(phi), -1, self.n_classes)
+        return out
+
+    def _path_shap(self, X):
+        # one fractions: does the patient's value fall in the path's interval (N x paths x depth)
+        x = X[:, np.where(self._used, self._feature, 0)]
+        one = ((x > self._lower) & (x <= self._upper)).astype(float)
+        one[:, ~self._used] = 0.0
+        zero = np.broadcast_to(self._zero, one.shape)
+        depth = one.shape[2]
+        # coef[..., i, s]: coefficient of t**s in prod_{j != i} (z_j + o_j t)
+        coef = np.zeros(one.shape + (depth,))
+        coef[..., 0] = 1.0
+        for j in range(depth):
+            shifted = np.zeros_like(coef)
+            shifted[..., 1:] = coef[..., :-1]
+            updated = coef * zero[..., j, None, None] + shifted * one[..., j, None, None]
+            others = np.arange(depth) != j
+            coef[..., others, :] = updated[..., others, :]
+        weighted = (coef * self._weights[:, None, :]).sum(axis=3)
+        return self._value[:, None] * (one - zero) * weighted * self._used
+
+    def explain_one(self, features):
+        key = tuple(np.asarray(features, dtype=np.float32).astype(float).tolist())
+        with self._lock:
+            phi = self._cache.get(key)
+            if phi is not None:
+                self._cache.move_to_end(key)
+                return phi.copy()
+        phi = self.shap_values(np.array([key]))[0]
+        with self._lock:
+            self._cache[key] = phi
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+        return phi.copy()
+
+
+def risk_contributions(shap_values):
+    """Per-feature push towards the highest class and away from the lowest (log-odds between them)."""
+    return shap_values[..., -1] - shap_values[..., 0]
+
+
+_explainers = {}
+
+def get_explainer(model_path):
+    """TreeExplainer for the model at ``model_path``, rebuilt when the file changes."""
+    model = load_model(model_path)
+    if not isinstance(model, TreeEnsemble):
+        raise TypeError('attributions need the exported tree model (.npz), not %s' % type(model).__name__)
+    fingerprint = get_registry().fingerprint(model_path)
+    cached = _explainers.get(model_path)
+    if cached is None or cached[0] != fingerprint:
+        cached = _explainers[model_path] = (fingerprint, TreeExplainer(model))
+    return cached[1]
@@ -0,0 +1,368 @@
+"""Long-lived matplotlib charts for the Tk pages.
+
+Each chart owns one Figure and one Tk canvas for the lifetime of its page.
+Fonts come from a per-chart rc context that is active while the chart
+builds artists and while it draws, so no global pyplot state is touched,
+and refreshing a chart only updates the data of existing artists.
+
+The factor chart is not kept as a live figure: ``render_factor_chart``
+draws it once to a PNG and the page shows the image. The global importances
+only change with the language and size, so that PNG is cached on disk under
+``factor_chart_path``; a patient's own contributions are rendered in memory.
+"""
+import hashlib
+import io
+import json
+import os
+import threading
+
+import numpy as np
+from matplotlib import rc_context
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.figure import Figure
+from matplotlib.ticker import FixedLocator, MaxNLocator
+
+from i18n import figure_font_family
+
+
+def figure_style(lang):
+    style = {'font.sans-serif': ['SimHei'], 'axes.unicode_minus': False, 'font.weight': 'normal', 'font.size': 26}
+    if lang == 'Chinese':
+        style['font.family'] = 'SimHei'
+    else:
+        style['font.family'] = 'serif'
+        style['font.serif'] = ['Times New Roman']
+    return style
+
+
+class ChartCanvas(FigureCanvasTkAgg):
+    """FigureCanvasTkAgg over its own Figure that always draws in the chart style.
+
+    Ticks and other artists matplotlib creates lazily at draw time pick up
+    the style too, because ``draw`` (also when Tk schedules it on a resize)
+    runs inside the rc context.
+    """
+
+    def __init__(self, master, lang_getter, **figure_kw):
+        self.lang_getter = lang_getter
+        with self.style():
+            figure = Figure(**figure_kw)
+        super().__init__(figure, master)
+        self._laid_out = False
+
+    def style(self):
+        return rc_context(figure_style(self.lang_getter()))
+
+    def draw(self):
+        with self.style():
+            super().draw()
+
+    def layout_once(self, **adjust):
+        # text sizes are only known once the artists have their text
+        if not self._laid_out:
+            with self.style():
+                self.figure.tight_layout()
+                if adjust:
+                    self.figure.subplots_adjust(**adjust)
+            self._laid_out = True
+
+
+class ScoreGauge(ChartCanvas):
+    """Red/yellow/green bar with the overall score and its risk band.
+
+    The score line, its label and the band arrow are animated artists: a
+    full draw renders only the static layer (gradient, thresholds, title,
+    axis), which is cached as a bitmap, and then adds them on top. A new
+    score restores that bitmap and blits just the dynamic artists; any full
+    draw (resize, language change) refreshes the cache.
+    """
+
+    def __init__(self, master, lang_getter):
+        super().__init__(master, lang_getter, figsize=(8, 3.3), dpi=100)
+        with self.style():
+            ax = self.ax = self.figure.add_subplot()
+            self.title = ax.set_title('', pad=60)
+            ax.imshow(np.linspace(0, 1, 1000).reshape(1, -1), aspect='auto', cmap='RdYlGn_r', extent=[0, 100, 0, 1])
+            self.score_line = ax.axvline(0, color='black', linewidth=2)
+            self.score_text = ax.text(0, 0.5, '', color='black', va='center', ha='center',
+                                      bbox=dict(facecolor='white', edgecolor='none', alpha=0.7))
+            for threshold in (33.3, 66.7):
+                ax.axvline(threshold, color='black', linestyle='--', linewidth=2)
+            self.band = ax.annotate('', xy=(0, 1), xytext=(0, 1.2),
+                                    arrowprops=dict(facecolor='black', shrink=0.1, headwidth=10, width=3),
+                                    ha='center', va='bottom', backgroundcolor='white', fontsize=30)
+            ax.set_yticks([])
+            ax.set_xlim(0, 100)
+        self._dynamic = (self.score_line, self.score_text, self.band)
+        for artist in self._dynamic:
+            artist.set_animated(True)
+        self._background = None
+        self.mpl_connect('draw_event', self._on_draw)
+
+    def _on_draw(self, event):
+        self._background = self.copy_from_bbox(self.figure.bbox)
+        self._draw_dynamic()
+
+    def _draw_dynamic(self):
+        with self.style():
+            for artist in self._dynamic:
+                self.figure.draw_artist(artist)
+
+    def update(self, score, title, band_text):
+        self.score_line.set_xdata([score, score])
+        self.score_text.set_x(score)
+        self.score_text.set_text(f'{score:.1f}')
+        self.band.set_text(band_text)
+        self.band.xy = (score, 1)
+        self.band.xyann = (score, 1.2)
+        if self._background is None or self.title.get_text() != title:
+            self.title.set_text(title)
+            self.layout_once()
+            self.draw_idle()
+        else:
+            self.restore_region(self._background)
+            self._draw_dynamic()
+            self.blit(self.figure.bbox)
+
+
+def lttb(x, y, n_out):
+    """Indices of ``n_out`` points that keep the shape of the series (largest-triangle-three-buckets).
+
+    The first and last points are always kept; every bucket in between
+    contributes the point forming the largest triangle with the point kept
+    from the previous bucket and the mean of the next bucket.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.intp)
+    keep = np.empty(n_out, dtype=np.intp)
+    keep[0], keep[-1] = 0, n - 1
+    previous = 0
+    for b in range(n_out - 2):
+        start, stop = edges[b], edges[b + 1]
+        next_stop = edges[b + 2] if b + 2 < len(edges) else n
+        next_x, next_y = x[stop:next_stop].mean(), y[stop:next_stop].mean()
+        area = np.abs((x[previous] - next_x) * (y[start:stop] - y[previous])
+                      - (x[previous] - x[start:stop]) * (next_y - y[previous]))
+        previous = keep[b + 1] = start + int(np.argmax(area))
+    return keep
+
+
+class HistoryChart(ChartCanvas):
+    """Line of past scores with value labels.
+
+    Long histories are drawn decimated: only the part inside the current x
+    limits is taken from the full series and reduced with ``lttb`` to at
+    most ``max_points`` vertices, so zooming in (toolbar zoom/pan changes
+    the limits) pulls in the full-resolution slice. All points are labelled
+    while at most ``label_all`` are in view; beyond that only the visible
+    minimum, maximum and the latest ``label_latest`` points are, so the
+    labels do not pile up.
+    """
+
+    max_points = 200
+    label_all = 20
+    label_latest = 1
+
+    def __init__(self, master, lang_getter, title, xlabel, ylabel):
+        super().__init__(master, lang_getter, figsize=(8, 6.8), dpi=100)
+        with self.style():
+            ax = self.ax = self.figure.add_subplot()
+            self.line, = ax.plot([], [], marker='o', linestyle='-', color='b', linewidth=3, label='Scores')
+            self.title = ax.set_title(title, pad=20)
+            self.xlabel = ax.set_xlabel(xlabel)
+            self.ylabel = ax.set_ylabel(ylabel)
+            ax.grid(True)
+        self.value_labels = []
+        self.x = self.y = np.zeros(0)
+        self._updating = False
+        ax.callbacks.connect('xlim_changed', self._on_xlim_changed)
+
+    def update(self, scores):
+        self.y = np.asarray(scores, dtype=float)
+        self.x = np.arange(1, len(self.y) + 1, dtype=float)
+        self._updating = True
+        try:
+            if len(self.y):
+                self.ax.set_xlim(0, len(self.y) + 0.05 * max(len(self.y) - 1, 1))
+                self.ax.set_ylim(self.y.min() - 5, self.y.max() + 5)
+        finally:
+            self._updating = False
+        self._show_view()
+        self.layout_once()
+        self.draw_idle()
+
+    def _on_xlim_changed(self, ax):
+        if not self._updating:
+            self._show_view()
+            self.draw_idle()
+
+    def _show_view(self):
+        lo, hi = self.ax.get_xlim()
+        # one point either side of the view so the line runs to the edges
+        start = max(int(np.searchsorted(self.x, lo, side='left')) - 1, 0)
+        stop = min(int(np.searchsorted(self.x, hi, side='right')) + 1, len(self.x))
+        x, y = self.x[start:stop], self.y[start:stop]
+        visible = np.flatnonzero((x >= lo) & (x <= hi))
+        if len(visible) <= self.label_all:
+            labelled = visible
+        else:
+            v = y[visible]
+            labelled = np.union1d(visible[[int(np.argmin(v)), int(np.argmax(v))]], visible[-self.label_latest:])
+        # labelled points stay on the line even when the decimation would drop them
+        drawn = np.union1d(lttb(x, y, self.max_points), labelled)
+        self.line.set_data(x[drawn], y[drawn])
+        self.line.set_marker('o' if len(drawn) == len(x) else '')
+        self._set_value_labels(x[labelled], y[labelled])
+        self._set_ticks(len(visible))
+
+    def _set_value_labels(self, xs, ys):
+        # value labels are pooled: reuse the existing Text artists, hide the ones not needed
+        while len(self.value_labels) < len(xs):
+            with self.style():
+                self.value_labels.append(self.ax.text(0, 0, '', fontsize=24, ha='center', va='bottom'))
+        for i, label in enumerate(self.value_labels):
+            if i < len(xs):
+                label.set_position((xs[i], ys[i] + 0.4))
+                label.set_text(str(round(ys[i], 1)))
+            label.set_visible(i < len(xs))
+
+    def _set_ticks(self, n_visible):
+        if len(self.x) and n_visible <= self.label_all and len(self.x) <= self.label_all:
+            # a locator, unlike set_xticks, never widens the view back out
+            self.ax.xaxis.set_major_locator(FixedLocator(range(0, len(self.x) + 1)))
+        else:
+            self.ax.xaxis.set_major_locator(MaxNLocator(nbins=6, integer=True))
+
+
+class SensitivityChart(ChartCanvas):
+    """Ranked horizontal bars of score changes, labelled on the other side of zero.
+
+    Bars and labels are a fixed pool of animated artists over a cached
+    static layer (frame, x axis, zero line), blitted like ScoreGauge. The x
+    range only grows in steps of ``limits``, so a full draw is needed only
+    when a change outgrows it.
+    """
+
+    limits = (1, 2, 5, 10, 20, 50, 100)
+
+    def __init__(self, master, lang_getter, xlabel, n_bars=8):
+        super().__init__(master, lang_getter, figsize=(8, 5), dpi=100)
+        with self.style():
+            ax = self.ax = self.figure.add_subplot()
+            self.bars = ax.barh(range(n_bars), [0] * n_bars, facecolor='Teal')
+            self.row_labels = [ax.text(0, i, '', fontsize=12, va='center') for i in range(n_bars)]
+            ax.axvline(0, color='black', linewidth=1)
+            self.xlabel = ax.set_xlabel(xlabel, fontsize=16)
+            ax.set_yticks([])
+            ax.tick_params(labelsize=14)
+            ax.set_ylim(n_bars - 0.5, -0.5)
+            ax.set_xlim(-self.limits[0], self.limits[0])
+        # the labels sit inside the axes, so it can span the figure
+        self.figure.subplots_adjust(left=0.04, right=0.96, top=0.97, bottom=0.14)
+        self._dynamic = list(self.bars) + self.row_labels
+        for artist in self._dynamic:
+            artist.set_animated(True)
+        self._background = None
+        self.mpl_connect('draw_event', self._on_draw)
+
+    def _on_draw(self, event):
+        self._background = self.copy_from_bbox(self.figure.bbox)
+        self._draw_dynamic()
+
+    def _draw_dynamic(self):
+        with self.style():
+            for artist in self._dynamic:
+                self.figure.draw_artist(artist)
+
+    def update(self, labels, deltas):
+        n = min(len(labels), len(self.bars))
+        largest = max((abs(d) for d in deltas[:n]), default=0.0) * 1.1
+        limit = self.ax.get_xlim()[1]
+        # keep the current range while it still fits and the bars are not tiny in it
+        if not limit / 20 < largest <= limit:
+            limit = next((l for l in self.limits if l >= largest), self.limits[-1])
+        for i, (bar, text) in enumerate(zip(self.bars, self.row_labels)):
+            delta = float(deltas[i]) if i < n else 0.0
+            bar.set_width(delta)
+            bar.set_facecolor('Firebrick' if delta > 0 else 'Teal')
+            text.set_text(labels[i] if i < n else '')
+            # the label sits on the free side of the zero line
+            text.set_x(-0.02 * limit if delta > 0 else 0.02 * limit)
+            text.set_horizontalalignment('right' if delta > 0 else 'left')
+        if self._background is None or limit != self.ax.get_xlim()[1]:
+            self.ax.set_xlim(-limit, limit)
+            self.draw_idle()
+        else:
+            self.restore_region(self._background)
+            self._draw_dynamic()
+            self.blit(self.figure.bbox)
+
+
+FACTOR_CHART_VERSION = 2
+
+
+def factor_chart_path(cache_dir, lang, width, height, title, factors, xlabel=None):
+    """Cache file for one rendering of the factor chart; the name hashes everything that changes the pixels."""
+    key = json.dumps([FACTOR_CHART_VERSION, lang, width, height, title, factors, xlabel], ensure_ascii=False)
+    return os.path.join(cache_dir, 'factors-%s.png' % hashlib.sha1(key.encode('utf-8')).hexdigest()[:16])
+
+
+def render_factor_chart(path, lang, title, factors, width, height, xlabel=None, signed=False):
+    """Render the horizontal importance bars to a ``width`` x ``height`` PNG.
+
+    Uses the Agg canvas only and passes fonts explicitly instead of through
+    rcParams, so it can run on a worker thread. The layout is the original
+    30 inch wide figure; the dpi scales it to the requested width. Global
+    importances use the log-like 0-1 scale; ``signed`` per-patient
+    contributions get a linear axis centred on zero, red for factors that
+    raise the risk and teal for those that lower it. Writes ``path`` and
+    returns it, or returns the PNG bytes when ``path`` is None.
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    dpi = width / 30
+    family = figure_font_family(lang)
+    figure = Figure(figsize=(30, height / dpi), dpi=dpi, facecolor="white", edgecolor='Teal', frameon=True)
+    FigureCanvasAgg(figure)
+    labels = [label for label, value in factors]
+    values = [value for label, value in factors]
+    positions = range(len(factors))
+    ax = figure.add_subplot()
+    ax.set_title(title, pad=20, fontsize=36, family=family)
+    if signed:
+        limit = 1.25 * max([abs(value) for value in values if value] or [1.0])
+        ax.set_xlim(-limit, limit)
+        ax.axvline(0, color='black', linewidth=1)
+        ax.barh(positions, values, facecolor=['Firebrick' if value > 0 else 'Teal' for value in values])
+    else:
+        ax.set_xscale('symlog', linthresh=0.00005)
+        ax.set_xlim(0, 1)
+        ax.barh(positions, values, facecolor='Teal')
+    if xlabel:
+        ax.set_xlabel(xlabel, fontsize=26, family=family)
+    ax.set_yticks(positions, labels)
+    ax.tick_params(labelsize=24)
+    for label in ax.get_yticklabels():
+        label.set_fontfamily(family)
+    for label in ax.get_xticklabels():
+        label.set_fontfamily('Times New Roman')
+    ax.invert_yaxis()
+    for position, value in zip(positions, values):
+        if signed:
+            offset = 0.02 * limit if value >= 0 else -0.02 * limit
+            ax.text(value + offset, position, '%+.2f' % value, fontsize=26, family=family, va='center',
+                    ha='left' if value >= 0 else 'right')
+        else:
+            ax.text((1 + 0.03) * value, position, '%.1g' % value, fontsize=26, family=family)
+    figure.tight_layout()
+    figure.subplots_adjust(left=0.255, right=0.9, top=0.91, bottom=0.15 if xlabel else 0.08)
+    if path is None:
+        out = io.BytesIO()
+        figure.savefig(out, format='png', dpi=dpi, facecolor="white", edgecolor='Teal')
+        return out.getvalue()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = '%s.%d.tmp' % (path, threading.get_ident())
+    figure.savefig(tmp_path, format='png', dpi=dpi, facecolor="white", edgecolor='Teal')
+    os.replace(tmp_path, path)
+    return path
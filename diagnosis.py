@@ -1,75 +1,124 @@
+import sys
+import os
+import threading
+from startup import LazyModule, Warmup, profiler, register_font
+if __name__ == '__main__' and '--profile-startup' in sys.argv:
+    profiler.enable()
 import customtkinter as ctk
 import tkinter as tk
-import numpy as np
 from collections import OrderedDict
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import matplotlib.pyplot as plt
-from PIL import Image, ImageTk
-import sys
-import os
-import pickle
-import math
-import json
 from tkinter import messagebox
-from matplotlib import font_manager
-from matplotlib.font_manager import FontProperties
-
-def load_translations(filepath):
-    with open(filepath, 'r', encoding='utf-8') as file:
-        return json.load(file)
-    
-def load_user_data(file_path):
-    if not os.path.exists(file_path):
-        return {}
-    with open(file_path, "r", encoding="utf-8") as file:
-        return json.load(file)
-
-def save_user_data(file_path, data):
-    with open(file_path, "w", encoding="utf-8") as file:
-        json.dump(data, file, indent=4)
+from model_registry import load_model
+from inference import InferenceWorker
+from prediction_cache import get_prediction_cache
+from paths import base_path, user_cache_dir
+from storage import RecordStore
+from docstore import JsonDocumentStore
+from i18n import TextBinder, TranslationTables, load_translations
+from fields import FACTOR_KEYS, FIELD_OPTION_SETS, FIELD_RANGES, RAW_FIELDS, RISK_BANDS, SELECT_MASK
+
+def register_fonts():
+    register_font(os.path.join(basepath, 'data', 'SimHei.ttf')) # 替换为SimHei.ttf的实际路径
+
+# only the login screen is needed at startup; plotting, images and the model load on first use
+# (PyInstaller cannot see these imports: local modules only reached here are --hidden-import in mac.zsh / windows.bash)
+np = LazyModule('numpy')
+charts = LazyModule('charts', before=register_fonts)
+Image = LazyModule('PIL.Image')
+ImageTk = LazyModule('PIL.ImageTk')
+scoring = LazyModule('scoring')
+attribution = LazyModule('attribution')
+whatif = LazyModule('whatif')
+
+
+
+
+class TooltipManager:
+    """One tooltip window shared by every widget of the app.
+
+    The toplevel is created on first use and then only withdrawn and shown
+    again with new text, font and position. Pointer motion is coalesced:
+    the window moves at most once per ``frame_ms`` (one 60 Hz frame) to
+    the latest pointer position.
+    """
+
+    def __init__(self, root, frame_ms=16):
+        self.root = root
+        self.frame_ms = frame_ms
+        self.window = None
+        self.label = None
+        self.owner = None
+        self._position = None
+        self._move_job = None
+
+    def _ensure_window(self):
+        if self.window is None:
+            self.window = ctk.CTkToplevel(self.root)
+            self.window.withdraw()
+            self.window.wm_overrideredirect(True)
+            self.label = ctk.CTkLabel(self.window, text='', corner_radius=5)
+            self.label.pack()
+            self.default_font = self.label.cget('font')
+
+    def show(self, owner, text, font, x, y):
+        self._ensure_window()
+        self.owner = owner
+        self.label.configure(text=text, font=font if font is not None else self.default_font)
+        self.window.wm_geometry(f"+{x}+{y}")
+        self.window.deiconify()
+        self.window.lift()
+
+    def move(self, owner, x, y):
+        if owner is not self.owner:
+            return
+        self._position = (x, y)
+        if self._move_job is None:
+            self._move_job = self.root.after(self.frame_ms, self._apply_move)
 
-def get_translation(translations, lang, key):
-    return translations.get(lang, {}).get(key, key)
+    def _apply_move(self):
+        self._move_job = None
+        if self.owner is not None:
+            self.window.wm_geometry("+%d+%d" % self._position)
 
+    def hide(self, owner):
+        if owner is not self.owner:
+            return
+        self.owner = None
+        if self._move_job is not None:
+            self.root.after_cancel(self._move_job)
+            self._move_job = None
+        self.window.withdraw()
 
 
 class CreateToolTip:
-    def __init__(self, widget, text, font = None, delay=450):
+    def __init__(self, widget, text, manager, font = None, delay=450):
         self.font = font
         self.widget = widget
         self.text = text
-        self.tooltip = None
+        self.manager = manager
         self.delay = delay
         self._after_id = None
         self.widget.bind("<Enter>", self.schedule_show_tooltip)
         self.widget.bind("<Leave>", self.hide_tooltip)
         self.widget.bind("<Motion>", self.move_tooltip)
+        # pages destroy their widgets on removal; the shared window must not stay up
+        self.widget.bind("<Destroy>", self.hide_tooltip)
 
     def schedule_show_tooltip(self, event):
         self._after_id = self.widget.after(self.delay, self.show_tooltip, event)
 
     def show_tooltip(self, event):
-        x = event.x_root + 10
-        y = event.y_root + 10
-        self.tooltip = ctk.CTkToplevel(self.widget)
-        self.tooltip.wm_overrideredirect(True)
-        self.tooltip.wm_geometry(f"+{x}+{y}")
-        label = ctk.CTkLabel(self.tooltip, text=self.text, corner_radius=5, font = self.font)
-        label.pack()
+        self._after_id = None
+        self.manager.show(self, self.text, self.font, event.x_root + 10, event.y_root + 10)
 
     def hide_tooltip(self, event):
         if self._after_id:
             self.widget.after_cancel(self._after_id)
             self._after_id = None
-        if self.tooltip:
-            self.tooltip.destroy()
-            self.tooltip = None
+        self.manager.hide(self)
 
     def move_tooltip(self, event):
-        if self.tooltip:
-            x = event.x_root + 10
-            y = event.y_root + 10
-            self.tooltip.wm_geometry(f"+{x}+{y}")
+        self.manager.move(self, event.x_root + 10, event.y_root + 10)
 
 class MyScrollableCheckboxFrame(ctk.CTkScrollableFrame):
     def __init__(self, master, title, labels, suggestions, instructions, num_columns, font, get_text):
@@ -89,7 +138,8 @@ class MyScrollableCheckboxFrame(ctk.CTkScrollableFrame):
         self.tooltip_handles = []
         self.output_labels = None
         self.entries = []
-        self.options = ["None", "A little", "Somewhat", "Quite a bit", "Severe"]
+        self.variables = []
+        self.app = master.parent
         self.font = font
         self.get_text = get_text
         self.lrow = 1
@@ -110,7 +160,8 @@ class MyScrollableCheckboxFrame(ctk.CTkScrollableFrame):
             else:
                 label_frame.grid(row=row+1, column=column*2, columnspan = 2, padx=5, pady=5, sticky='w')
             
-            label = ctk.CTkLabel(label_frame, text=get_text(label_text), font=self.font, bg_color=bg_color, fg_color=bg_color)
+            label = ctk.CTkLabel(label_frame, font=self.font, bg_color=bg_color, fg_color=bg_color)
+            master.parent.texts.bind(label, label_text)
             label.pack(side='left')
             self.label_handles.append(label)
             if i < 28:  # 前28项为必填
@@ -118,27 +169,27 @@ class MyScrollableCheckboxFrame(ctk.CTkScrollableFrame):
                 asterisk.pack(side='left')
 
             tooltip_text = self.get_text(self.instructions[i])
-            tooltip = CreateToolTip(label, tooltip_text, font=self.font)
+            tooltip = CreateToolTip(label, tooltip_text, self.app.tooltips, font=self.font)
             self.tooltip_handles.append(tooltip)
             custom_font = ctk.CTkFont(family="Helvetica", size=master.parent.fontsize)
             if self.suggestions is None:
                 entry_b = ctk.StringVar(value='')
                 entry_var = ctk.StringVar(value='-')
             else:
-                entry_b = ctk.StringVar(value=self.get_text(self.int2str(i, suggestions[label_text])))
-                entry_var = ctk.StringVar(value=self.get_text(self.int2str(i, suggestions[label_text])))
+                entry_b = ctk.StringVar(value=self.int2str(i, suggestions[label_text]))
+                entry_var = ctk.StringVar(value=self.int2str(i, suggestions[label_text]))
             if i < 4:
                 entry = ctk.CTkEntry(self, textvariable=entry_b, font = custom_font)
             elif i < 28:
-                entry = ctk.CTkOptionMenu(self, variable=entry_var, values=self.options, font=custom_font)
+                entry = ctk.CTkOptionMenu(self, variable=entry_var, values=self.option_labels(i), font=custom_font)
                 entry._dropdown_menu.configure(font=custom_font)
             elif i < 30:
-                entry = ctk.CTkOptionMenu(self, variable=entry_var, values=['No', 'Yes'], font=custom_font)
+                entry = ctk.CTkOptionMenu(self, variable=entry_var, values=self.option_labels(i), font=custom_font)
                 entry._dropdown_menu.configure(font=custom_font)
             elif i < 32:
                 entry = ctk.CTkEntry(self, textvariable=entry_b, font = custom_font)
             else:
-                entry = ctk.CTkOptionMenu(self, variable=entry_var, values=['No', 'Yes'], font=custom_font)
+                entry = ctk.CTkOptionMenu(self, variable=entry_var, values=self.option_labels(i), font=custom_font)
                 entry._dropdown_menu.configure(font=custom_font)
                 
             if i != 30 and i != 31:
@@ -147,12 +198,22 @@ class MyScrollableCheckboxFrame(ctk.CTkScrollableFrame):
                 entry.grid(row=row+1, column=2, columnspan = 2, padx=5, pady=5, sticky='w')
 
             self.entries.append(entry)
+            self.variables.append(entry_b if isinstance(entry, ctk.CTkEntry) else entry_var)
             self.lrow += 1
             self.grid_rowconfigure(row+1, weight=1)
             if row == 0:
                 self.grid_columnconfigure(column*2, weight=1)
                 self.grid_columnconfigure(column*2+1, weight=1)
         self.grid_rowconfigure(0, weight=1)
+        self.update_texts()
+        master.parent.texts.bind_callback(self, self.update_texts)
+
+    def set_values(self, suggestions):
+        for i, (label_text, variable) in enumerate(zip(self.labels.keys(), self.variables)):
+            if suggestions is None:
+                variable.set('' if isinstance(self.entries[i], ctk.CTkEntry) else '-')
+            else:
+                variable.set(self.int2str(i, suggestions[label_text]))
 
     def get(self):
         admit_pagechart = True
@@ -169,66 +230,28 @@ class MyScrollableCheckboxFrame(ctk.CTkScrollableFrame):
         return self.labels, admit_pagechart
     
     def update_texts(self):
-        # self.configure(label_text=self.get_text(self.title))
-        for i, (label_text, suggestion) in enumerate(self.labels.items()):
-            self.label_handles[i].configure(text=self.get_text(label_text))
+        # labels are bound to their keys; tooltips, option lists and the chosen options are not
         for i in range(len(self.instructions)):
             self.tooltip_handles[i].text = self.get_text(self.instructions[i])
-            if i >= 4 and i < 28:
-                self.entries[i].configure(values=[self.get_text(option) for option in self.options])
-            elif i >= 28 and i < 30 or i >= 32:
-                self.entries[i].configure(values=[self.get_text(option) for option in ['No', 'Yes']])
+            if self.option_set(i) is not None:
+                self.entries[i].configure(values=self.option_labels(i))
+                self.variables[i].set(self.int2str(i, self.str2int(i, self.variables[i].get())))
     
+    def option_set(self, i):
+        return FIELD_OPTION_SETS[i]
+
+    def option_labels(self, i):
+        return self.app.translations.labels(self.app.lang, self.option_set(i))
+
     def str2int(self, i, str_):
-        if str_ == "None" or str_ == "没有" or str_ == "Ninguno" :
-            return '0'
-        elif str_ == "A little" or str_ == "轻微" or str_ == "Un poco" :
-            return '1'
-        elif str_ == "Somewhat" or str_ == "有一些" or str_ == "Algo" :
-            return '2'
-        elif str_ == 'Quite a bit' or str_ == "较重" or str_ == "Relativamente grave" :
-            return '3'
-        elif str_ == 'Severe' or str_ == "严重" or str_ == "Severo" :
-            return '4'
-        elif str_ == "Yes" or str_ == "是" or str_ == "Sí":
-            return '1'
-        elif str_ == "No" or str_ == "否":
-            return '0'
-        else:
-            return str_
-        
+        # accepts the label in any language
+        name = self.option_set(i)
+        return str_ if name is None else self.app.translations.to_ordinal(name, str_)
+
     def int2str(self, i, int_):
-        if int_ == "0" :
-            if i >= 4 and i < 28:
-                return "None"
-            elif i >= 28 and i < 30 or i >= 32:
-                return "No"
-            else:
-                return int_
-        elif int_ == "1" :
-            if i >= 4 and i < 28:
-                return "A little"
-            elif i >= 28 and i < 30 or i >= 32:
-                return "Yes"
-            else:
-                return int_
-        elif int_ == "2" :
-            if i >= 4 and i < 28:
-                return "Somewhat"
-            else:
-                return int_
-        elif int_ == "3" :
-            if i >= 4 and i < 28:
-                return "Quite a bit"
-            else:
-                return int_
-        elif int_ == "4" :
-            if i >= 4 and i < 28:
-                return "Severe"
-            else:
-                return int_
-        else:
-            return int_
+        # the label in the current language
+        name = self.option_set(i)
+        return int_ if name is None else self.app.translations.to_label(self.app.lang, name, int_)
 
 class PLOTFrame(ctk.CTkScrollableFrame):
     def __init__(self, master, title=None, font=None, get_text=None, fg_color = 'white', height=50):
@@ -244,54 +267,45 @@ class PLOTFrame(ctk.CTkScrollableFrame):
             self.bind_all("<MouseWheel>", on_mouse_wheel)
 
     def construct(self):
-        select_mask = ['Mobility', 'ArmSwelling', 'BreastSwelling', 'Skin', 'FHT', 'DISCOMFORT'\
-        , 'SYM_COUNT', 'ChestWallSwelling', 'Mastectomy', 'Lumpectomy', 'TIME_LAPSE']
-        data_select = np.array([[self.master.parent.output_labels[item] for item in select_mask]], dtype=float)
-        model_path = os.path.join(basepath, 'models' , 'GBT.pkl')
-        with open(model_path, 'rb') as f:
-            model = pickle.load(f)
-            
-        self.y_pred = model.predict_proba(data_select).squeeze()
+        self.canvas = None
+        self.comments = None
+        self.data_version = None
+        self.pending_label = self.master.parent.texts.bind(ctk.CTkLabel(self, font=self.font), "Scoring...")
+        self.refresh()
+        self.createWidget()
+
+    def refresh(self):
+        # the scores come from the inference worker; only redraw when a new result has arrived
+        self.set_pending(self.master.parent.inference.pending)
+        if self.master.parent.inference.pending or self.master.parent.y_pred is None:
+            return
+        if self.data_version == self.master.parent.data_version:
+            return
+        self.data_version = self.master.parent.data_version
+        self.y_pred = self.master.parent.y_pred
 
         self.create_figure1()
-        self.createWidget()
+
+    def set_pending(self, pending):
+        if not pending:
+            self.pending_label.pack_forget()
+        elif not self.pending_label.winfo_ismapped():
+            children = [widget for widget in self.pack_slaves() if widget is not self.pending_label]
+            if children:
+                self.pending_label.pack(side='top', before=children[0])
+            else:
+                self.pending_label.pack(side='top')
 
     def createWidget(self):
         self.grid_columnconfigure(0, weight=1)
 
     def save_score(self):
         if self.master.parent.score_save_flag:
-            with open(self.master.parent.record_data_path, 'r') as json_file:
-                existing_data = json.load(json_file)
-                user_dict = existing_data[self.master.parent.current_user]
-                if 'score_list' not in user_dict:
-                    user_dict['score_list'] = [self.overall_score]
-                else: 
-                    user_dict['score_list'].append(self.overall_score)
-            with open(self.master.parent.record_data_path, 'w') as json_file:
-                json.dump(existing_data, json_file, indent=4)
+            self.master.parent.store.append_score(self.master.parent.score_user, self.overall_score, self.y_pred)
             self.master.parent.score_save_flag = False
 
     def cal_overall_score(self, y_pred):
-        max_index = np.argsort(y_pred)[-1]
-        submax_index = np.argsort(y_pred)[-2]
-        if max_index == 2:
-            base_score = 2 / 3 
-            bias = (y_pred[max_index] - y_pred[submax_index]) / 3
-            overall_score = base_score + bias
-        elif max_index == 0:
-            base_score = 0 / 3 
-            bias = (y_pred[max_index] - y_pred[submax_index]) / 3
-            overall_score = base_score + bias
-        elif max_index == 1:
-            base_score = 1 / 2 
-            bias = (y_pred[max_index] - y_pred[submax_index]) / 6
-            if submax_index == 2:
-                overall_score = base_score + bias
-            else:
-                overall_score = base_score - bias
-        overall_score *= 100
-        return overall_score
+        return scoring.cal_overall_score(y_pred)
         
     def create_figure1(self):
         max_label = np.argmax(self.y_pred)
@@ -299,94 +313,58 @@ class PLOTFrame(ctk.CTkScrollableFrame):
         self.overall_score = overall_score
         self.save_score()
 
-        # 创建一个Figure
-        plt.figure(num = 1, figsize=(8, 3.3), dpi=100)
-        
-        plt.rcParams['font.sans-serif'] = ['SimHei']
-        plt.rcParams['axes.unicode_minus'] = False  # 解决负号显示问题
-        if self.master.parent.lang == 'Chinese':
-            font = {'family': 'SimHei', 'weight': 'normal', 'size': 26}
-        else:
-            font = {'family': 'serif', 'serif': 'Times New Roman', 'weight': 'normal', 'size': 26}
-        plt.rc('font', **font)
-
-        # 创建分段渐变条
-        plt.title(self.get_text('Lymphedema score'), pad=60)
-        gradient = np.linspace(0, 1, 1000).reshape(1, -1)
-        plt.imshow(gradient, aspect='auto', cmap='RdYlGn_r', extent=[0, 100, 0, 1])
-
-        # 绘制风险评分的指示线
-        plt.axvline(overall_score, color='black', linewidth=2)
-        plt.text(overall_score, 0.5, f'{overall_score:.1f}', color='black', va='center', ha='center', bbox=dict(facecolor='white',edgecolor='none', alpha=0.7))
-
-        # 添加分界线
-        threshold1 = 33.3
-        threshold2 = 66.7
-        plt.axvline(threshold1, color='black', linestyle='--', linewidth=2)
-        plt.axvline(threshold2, color='black', linestyle='--', linewidth=2)
-
-        # 添加箭头符号指示当前值，并将箭头放在图像上方
-        re_dict = {0: "low_risk", 1: "mild", 2: "moderate_severe"}
-        plt.gca().annotate(
-            self.master.parent.get_text(re_dict[np.argsort(self.y_pred)[-1]]), xy=(overall_score, 1), xytext=(overall_score, 1.2),
-            arrowprops=dict(facecolor='black', shrink=0.1, headwidth=10, width=3),
-            ha='center', va='bottom', backgroundcolor='white',
-            fontsize=30
-        )
-
-        # 设置图形标题和标签
-        plt.gca().set_yticks([])
-        plt.gca().set_xlim(0, 100)
-        plt.tight_layout()
-
-        self.canvas = FigureCanvasTkAgg(plt.figure(num=1), self)
-        self.canvas.draw()
-        self.canvas.get_tk_widget().pack(side='top', fill='both', expand=1)
+        # the gauge is built once; later results only move its line, label and arrow
+        re_dict = RISK_BANDS
+        self.band_key = re_dict[np.argsort(self.y_pred)[-1]]
+        if self.canvas is None:
+            self.canvas = charts.ScoreGauge(self, lambda: self.master.parent.lang)
+            self.canvas.get_tk_widget().pack(side='top', fill='both', expand=1)
+            self.master.parent.texts.bind_figure(self.canvas, lambda: [(self.canvas.title, 'Lymphedema score'), (self.canvas.band, self.band_key)],
+                                                 lambda: self.master.parent.lang)
+        self.canvas.update(overall_score, self.get_text('Lymphedema score'), self.master.parent.get_text(self.band_key))
         # 在图表下添加文字
-        with open(self.master.parent.record_data_path, 'r') as json_file:
-            existing_data = json.load(json_file)
-            try:
-                score_list = existing_data[self.master.parent.current_user]['score_list']
-            except:
-                score_list = None
+        score_list = self.master.parent.store.load_scores(self.master.parent.current_user, last=2) or None
 
-        if self.font[1] > 24:
-            comments = ctk.CTkTextbox(self, font=self.font, width=1500, height=750)
-        else:
-            comments = ctk.CTkTextbox(self, font=self.font, width=1500, height=500)
+        self.comment_key = None
         if score_list is None or len(score_list) == 1:
             if max_label == 1 or max_label == 2:
-                comments.insert('1.0', self.master.parent.get_text(f'This is your first time detecting Lymphedema. Keep on excercising and let us see your progress!'))
+                self.comment_key = 'This is your first time detecting Lymphedema. Keep on excercising and let us see your progress!'
             elif max_label == 0:
-                comments.insert('1.0', self.master.parent.get_text(f'This is your first time detecting Lymphedema. Keep on the good record!'))
+                self.comment_key = 'This is your first time detecting Lymphedema. Keep on the good record!'
         else:
             last_time_score = score_list[-2]
             if max_label == 0:
-                comments.insert('1.0', self.master.parent.get_text(f'Your detection result shows low risk, keep on the good record!'))
+                self.comment_key = 'Your detection result shows low risk, keep on the good record!'
             elif overall_score > last_time_score and (max_label == 1 or max_label == 2):
-                comments.insert('1.0', self.master.parent.get_text(f'Your detection result requires further inspection, please advice the doctors for further help. Keep on excercising and let us see your progress!'))
+                self.comment_key = 'Your detection result requires further inspection, please advice the doctors for further help. Keep on excercising and let us see your progress!'
             elif overall_score == last_time_score and (max_label == 1 or max_label == 2):
-                comments.insert('1.0', self.master.parent.get_text(f'Your detection result does not change since the last time. Keep on excercising and let us see your progress!'))
+                self.comment_key = 'Your detection result does not change since the last time. Keep on excercising and let us see your progress!'
             elif overall_score < last_time_score - 3 and (max_label == 1 or max_label == 2):
-                comments.insert('1.0', self.master.parent.get_text(f'Congratulations! Your detection result is much better than your last time. Keep on the good record!'))
+                self.comment_key = 'Congratulations! Your detection result is much better than your last time. Keep on the good record!'
             elif overall_score < last_time_score and (max_label == 1 or max_label == 2):
-                comments.insert('1.0', self.master.parent.get_text(f'Congratulations! Your detection result is better than your last time. Keep on excercising and keep on the good record!'))
+                self.comment_key = 'Congratulations! Your detection result is better than your last time. Keep on excercising and keep on the good record!'
+        self.diagnosis_key = f'diag_{re_dict[max_label]}'
 
+        if self.comments is None:
+            if self.font[1] > 24:
+                self.comments = ctk.CTkTextbox(self, font=self.font, width=1500, height=750)
+            else:
+                self.comments = ctk.CTkTextbox(self, font=self.font, width=1500, height=500)
+            self.comments.pack()
+            self.master.parent.texts.bind_callback(self.comments, self.write_comments)
+        self.write_comments()
+
+    def write_comments(self):
+        comments = self.comments
+        comments.configure(state="normal")
+        comments.delete('1.0', 'end')
+        if self.comment_key is not None:
+            comments.insert('1.0', self.master.parent.get_text(self.comment_key))
         # 获取现有文本的末尾位置
         end_position = comments.index("end-1c")
         # 在末尾添加新文本
-        comments.insert(end_position, '\n\n' + self.master.parent.get_text(f'diag_{re_dict[max_label]}') + self.master.parent.get_text("recommendation"))
+        comments.insert(end_position, '\n\n' + self.master.parent.get_text(self.diagnosis_key) + self.master.parent.get_text("recommendation"))
         comments.configure(state="disabled")
-        comments.pack()
-
-    def update_texts(self):
-        self.remove()
-        self.construct()
-
-    def remove(self):
-        plt.close('all')
-        for widget in self.winfo_children():
-            widget.destroy()
 
 
 class Page1(ctk.CTkFrame):
@@ -394,22 +372,31 @@ class Page1(ctk.CTkFrame):
         super().__init__(parent)
         self.parent = parent
         self.font = self.parent.font_list[0]
+        self.constructed = False
         self.construct()
 
     def construct(self):
-        self.page_label = ctk.CTkLabel(self, text=self.parent.get_text("title"), font=self.font)
+        self.constructed = True
+        self.logged_in = self.parent.current_user is not None
+        self.page_label = self.parent.texts.bind(ctk.CTkLabel(self, font=self.font), "title")
         self.page_label.grid(row=0, column=0, pady=50)
 
         self.button_login, self.button_begin = None, None
         if self.parent.current_user is None:
-            self.button_login = ctk.CTkButton(self, text=self.parent.get_text("Login/Register"), command=lambda: self.parent.show_frame("PageLogin"), font=self.font)
+            self.button_login = self.parent.texts.bind(ctk.CTkButton(self, command=lambda: self.parent.show_frame("PageLogin"), font=self.font), "Login/Register")
             self.button_login.grid(row=1, column=0, pady=10)
         else:
-            self.button_begin = ctk.CTkButton(self, text=self.parent.get_text("begin_detection"), command=lambda: self.parent.show_frame("Page2"), font=self.font)
+            self.button_begin = self.parent.texts.bind(ctk.CTkButton(self, command=lambda: self.parent.show_frame("Page2"), font=self.font), "begin_detection")
             self.button_begin.grid(row=2, column=0, pady=10)
-        self.button_about = ctk.CTkButton(self, text=self.parent.get_text("about"), command=lambda: self.parent.show_frame("Pageabout"), font=self.font)
+        self.button_about = self.parent.texts.bind(ctk.CTkButton(self, command=lambda: self.parent.show_frame("Pageabout"), font=self.font), "about")
         self.button_about.grid(row=3, column=0, pady=10)
 
+    def refresh(self):
+        # the login/begin button depends on whether somebody is logged in
+        if self.logged_in != (self.parent.current_user is not None):
+            self.remove()
+            self.construct()
+
     def remove(self):
         for widget in self.winfo_children():
             widget.destroy()
@@ -419,26 +406,26 @@ class Page1(ctk.CTkFrame):
             self.grid_rowconfigure(row, weight=0)
         self.grid_columnconfigure(0, weight=1)
 
-    def update_texts(self):
-        self.page_label.configure(text=self.parent.get_text("title"))
-        if self.button_login is not None:
-            self.button_login.configure(text=self.parent.get_text("Login/Register"))
-        if self.button_begin is not None:
-            self.button_begin.configure(text=self.parent.get_text("begin_detection"))
-        self.button_about.configure(text=self.parent.get_text("about"))
-
 class Pageabout(ctk.CTkFrame):
     def __init__(self, parent):
         super().__init__(parent)
         self.parent = parent
         self.font = self.parent.font_list[0]
+        self.constructed = False
+
+    def construct(self):
+        # the logos need PIL, so the page is only built when it is first shown
+        self.constructed = True
         self.create_widgets()
 
+    def refresh(self):
+        pass
+
     def create_widgets(self):
-        self.about_label = ctk.CTkLabel(self, text=self.parent.get_text("about"), font=self.font)
+        self.about_label = self.parent.texts.bind(ctk.CTkLabel(self, font=self.font), "about")
         self.about_label.grid(row=0, column=0, pady=25, columnspan=3, sticky="ew")
 
-        self.about_text = ctk.CTkLabel(self, text=self.parent.get_text("about_text"), font=self.font, wraplength=700)
+        self.about_text = self.parent.texts.bind(ctk.CTkLabel(self, font=self.font, wraplength=700), "about_text")
         self.about_text.grid(row=1, column=0, padx=25, columnspan=3, pady=10)
 
         image = Image.open(os.path.join(basepath, "data", "UMKC.png")).resize((300, 300))
@@ -459,7 +446,7 @@ class Pageabout(ctk.CTkFrame):
         self.image_label3.image = tk_image3
         self.image_label3.grid(row=2, column=2, padx=25, pady=10)
 
-        self.return_button = ctk.CTkButton(self, text=self.parent.get_text("return_main_menu"), command=lambda: self.parent.show_frame("Page1"), font=self.font)
+        self.return_button = self.parent.texts.bind(ctk.CTkButton(self, command=lambda: self.parent.show_frame("Page1"), font=self.font), "return_main_menu")
         self.return_button.grid(row=3, column=1, padx=25, pady=10)
 
     def configure_grid(self):
@@ -468,11 +455,6 @@ class Pageabout(ctk.CTkFrame):
         for col in range(3):
             self.grid_columnconfigure(col, weight=1)
 
-    def update_texts(self):
-        self.about_label.configure(text=self.parent.get_text("about"))
-        self.about_text.configure(text=self.parent.get_text("about_text"))
-        self.return_button.configure(text=self.parent.get_text("return_main_menu"))
-
 class Page2(ctk.CTkFrame):
     def __init__(self, parent):
         super().__init__(parent)
@@ -482,26 +464,10 @@ class Page2(ctk.CTkFrame):
         self.constructed = False
 
     def load_suggestions(self):
-        if os.path.exists(self.parent.record_data_path):
-            with open(self.parent.record_data_path, 'r') as json_file:
-                json_data = json.load(json_file, object_pairs_hook=OrderedDict)
-                if self.parent.current_user in json_data:
-                    data = json_data[self.parent.current_user]['suggestions']
-                else:
-                    data = None
-                return data
-        else:
-            return {}
+        return self.parent.store.load_suggestions(self.parent.current_user)
         
     def save_suggestions(self, suggestions):
-        existing_data = load_user_data(self.parent.record_data_path)
-        try:
-            existing_data[self.parent.current_user]['suggestions'] = suggestions
-        except:
-            existing_data[self.parent.current_user] = {}
-            existing_data[self.parent.current_user]['suggestions'] = suggestions
-        with open(self.parent.record_data_path, 'w') as json_file:
-            json.dump(existing_data, json_file, indent=4)
+        self.parent.store.save_suggestions(self.parent.current_user, suggestions)
 
     def construct(self):
         if not self.constructed:
@@ -512,7 +478,7 @@ class Page2(ctk.CTkFrame):
             suggestions = self.load_suggestions()
         self.reset_flag = False
 
-        self.page_label = ctk.CTkLabel(self, text=self.parent.get_text("detection_page"), font=self.font)
+        self.page_label = self.parent.texts.bind(ctk.CTkLabel(self, font=self.font), "detection_page")
         self.page_label.grid(row=0, column=0, pady=25, sticky="ew", columnspan=4)
 
         self.scrollable_checkbox_frame = MyScrollableCheckboxFrame(self, title="reported_symptoms", labels=self.parent.labels, suggestions = suggestions, instructions=self.parent.instructions, num_columns=2, font=self.font, get_text=self.parent.get_text)
@@ -525,8 +491,10 @@ class Page2(ctk.CTkFrame):
                 return
             suggestions = self.parent.labels
             self.save_suggestions(suggestions)
-            self.parent.output_labels = self.label_processing(self.parent.labels)
-            self.parent.score_save_flag = True
+            # scored on the worker thread; a newer submit supersedes this one. The score is
+            # saved for the user who submitted, whoever is logged in when it arrives
+            user = self.parent.current_user
+            self.parent.inference.submit(self.parent.labels, lambda result: self.on_scored(result, user), self.on_score_failed)
             self.parent.show_frame("Pagechart")
 
         def on_button_save():
@@ -540,18 +508,45 @@ class Page2(ctk.CTkFrame):
             if not response:
                 return
             self.reset_flag = True
-            self.parent.show_frame("Page2")
+            self.refresh()
             
-        self.submit_button = ctk.CTkButton(self, text=self.parent.get_text("Reset"), command=on_button_reset, font=self.font)
+        self.submit_button = self.parent.texts.bind(ctk.CTkButton(self, command=on_button_reset, font=self.font), "Reset")
         self.submit_button.grid(row=2, column=0, pady=20, sticky="ew")
-        self.submit_button = ctk.CTkButton(self, text=self.parent.get_text("Save"), command=on_button_save, font=self.font)
+        self.submit_button = self.parent.texts.bind(ctk.CTkButton(self, command=on_button_save, font=self.font), "Save")
         self.submit_button.grid(row=2, column=1, pady=20, sticky="ew")
-        self.submit_button = ctk.CTkButton(self, text=self.parent.get_text("submit"), command=on_button_submit, font=self.font)
+        self.submit_button = self.parent.texts.bind(ctk.CTkButton(self, command=on_button_submit, font=self.font), "submit")
         self.submit_button.grid(row=2, column=2, pady=20, sticky="ew")
-        self.back_button = ctk.CTkButton(self, text=self.parent.get_text("return"), command=lambda: self.parent.show_frame("Page1"), font=self.font)
+        self.back_button = self.parent.texts.bind(ctk.CTkButton(self, command=lambda: self.parent.show_frame("Page1"), font=self.font), "return")
         self.back_button.grid(row=2, column=3, pady=20, sticky="ew")
 
-        self.update_texts()
+    def on_scored(self, result, user):
+        if user != self.parent.current_user:
+            # submitted before a logout; end_session normally cancels it first
+            return
+        self.parent.output_labels = result['output_labels']
+        self.parent.y_pred = result['y_pred']
+        self.parent.data_version += 1
+        self.parent.score_save_flag = True
+        self.parent.score_user = user
+        if self.parent.frames["Pagechart"].constructed:
+            self.parent.frames["Pagechart"].refresh()
+
+    def on_score_failed(self, error):
+        if self.parent.frames["Pagechart"].constructed:
+            self.parent.frames["Pagechart"].refresh()
+        if isinstance(error, ValueError):
+            messagebox.showwarning(self.parent.get_text("Incomplete Data"), self.parent.get_text("Data not fully completed. Please fill in all required fields."))
+        else:
+            messagebox.showerror(self.parent.get_text("Error"), str(error))
+        self.parent.show_frame("Page2")
+
+    def refresh(self):
+        if self.reset_flag:
+            suggestions = None
+        else:
+            suggestions = self.load_suggestions()
+        self.reset_flag = False
+        self.scrollable_checkbox_frame.set_values(suggestions)
 
     def configure_grid(self):
         self.grid_rowconfigure(0, weight=0)
@@ -560,46 +555,6 @@ class Page2(ctk.CTkFrame):
         for col in range(4):
             self.grid_columnconfigure(col, weight=1)
 
-    def update_texts(self):
-        self.page_label.configure(text=self.parent.get_text("detection_page"))
-        self.submit_button.configure(text=self.parent.get_text("submit"))
-        self.back_button.configure(text=self.parent.get_text("return"))
-        self.scrollable_checkbox_frame.update_texts()
-    
-    def remove(self):
-        for widget in self.winfo_children():
-            widget.destroy()
-            
-    def validate_str(self, _str):
-        if _str == '-':
-            return '0'
-        else:
-            return _str
-
-    def label_processing(self, labels):
-        def str2b(str_):
-            return 0 if str_ == '0' else 1
-        output_labels = OrderedDict({'BMI': "22.1", 'Age': "40", 'TIME_LAPSE': "1", 'Mobility': "1", 'ArmSwelling': "0", 'BreastSwelling': "0", 'Skin': "0", 'PAS': "0", 'FHT': "1", 'DISCOMFORT': "0", 'SYM_COUNT': "2", 'ChestWallSwelling': "0", 'Chemotherapy': "1", 'Radiation': "0", 'Number_nodes': "1", 'Mastectomy': "1", 'Lumpectomy': "0", 'Hormonal': "0"})
-        output_labels['BMI'] = float(labels['Weight (Kg)']) / (float(labels['Height (cm)'])**2)
-        output_labels['Age'] = labels['Age (years)']
-        output_labels['TIME_LAPSE'] = math.log(float(labels['Time Lapse (years)']))
-        output_labels['Mobility'] = max(int(labels['Limited shoulder movement']), int(labels['Limited elbow movement']), int(labels['Limited wrist movement']), int(labels['Limited fingers movement']), int(labels['Limited arm movement']))
-        output_labels['ArmSwelling'] = labels['Arm or hand swelling']
-        output_labels['BreastSwelling'] = labels['Breast swelling']
-        output_labels['Skin'] = labels['Toughness or thickness of skin']
-        output_labels['PAS'] = labels['Pain, aching, soreness']
-        output_labels['FHT'] = max(int(labels['Firmness']), int(labels['Heaviness']), int(labels['Tightness']))
-        output_labels['DISCOMFORT'] = labels['Pain, aching, soreness']
-        output_labels['SYM_COUNT'] = sum(str2b(labels[k]) for k in ['Limited shoulder movement', 'Limited elbow movement', 'Limited wrist movement', 'Limited fingers movement', 'Limited arm movement', 'Arm or hand swelling', 'Breast swelling', 'Chest swelling', 'Toughness or thickness of skin', 'Pain, aching, soreness', 'Tightness', 'Firmness', 'Heaviness', 'Numbness', 'Burning', 'Stabbing', 'Tingling', 'Fatigue', 'Weakness', 'Redness', 'Hotness', 'Stiffness', 'Tenderness', 'Blister'])
-        output_labels['ChestWallSwelling'] = labels['Chest swelling']
-        output_labels['Chemotherapy'] = self.validate_str(labels['Chemotherapy'])
-        output_labels['Radiation'] = self.validate_str(labels['Radiation'])
-        output_labels['Number_nodes'] = int(self.validate_str(labels['SLNB_Removed_LN']))+ int(self.validate_str(labels['ALND_Removed_LN']))
-        output_labels['Mastectomy'] = self.validate_str(labels['Mastectomy'])
-        output_labels['Lumpectomy'] = self.validate_str(labels['Lumpectomy'])
-        output_labels['Hormonal'] = self.validate_str(labels['Hormonal therapy'])
-        return output_labels
-
 class Pagehistory(ctk.CTkFrame):
     def __init__(self, parent):
         super().__init__(parent)
@@ -617,89 +572,43 @@ class Pagehistory(ctk.CTkFrame):
     def construct(self):
         if not self.constructed:
             self.constructed = True
-        self.page_label = ctk.CTkLabel(self, text=self.parent.get_text("Detection History"), font=self.font)
+        self.page_label = self.parent.texts.bind(ctk.CTkLabel(self, font=self.font), "Detection History")
         self.page_label.grid(row=0, column=0, pady=25, sticky="ew")
 
         self.create_figure2()
-        self.back_button = ctk.CTkButton(self, text=self.get_text("return"), command=lambda: self.parent.show_frame("Pagechart"), font=self.font)
+        self.back_button = self.parent.texts.bind(ctk.CTkButton(self, command=lambda: self.parent.show_frame("Pagechart"), font=self.font), "return")
         self.back_button.grid(row=3, column=0, pady=20, sticky="ew")
 
-    def update_texts(self):
-        self.remove()
-        self.construct()
+    def refresh(self):
+        # a new score may have been saved since the last visit
+        self.show_recent(5)
 
-    def remove(self):
-        plt.close('all')
-        for widget in self.winfo_children():
-            widget.destroy()
-        
-    def create_figure2(self):
-        with open(self.parent.record_data_path, 'r') as json_file:
-            existing_data = json.load(json_file)
-            score_list = existing_data[self.parent.current_user]['score_list']
-
-        plt.figure(num = 3, figsize=(8, 6.8), dpi=100)
-        plt.rcParams['font.sans-serif'] = ['SimHei']
-        plt.rcParams['axes.unicode_minus'] = False  # 解决负号显示问题
-        if self.parent.lang == 'Chinese':
-            font = {'family': 'SimHei', 'weight': 'normal', 'size': 26}
-        else:
-            font = {'family': 'serif', 'serif': 'Times New Roman', 'weight': 'normal', 'size': 26}
-        plt.rc('font', **font)
-        
-        def plot_scores(scores):
-            x = range(1, len(scores) + 1)
-            plt.xticks(range(min(x) - 1, max(x) + 1, 1))
-            plt.ylim(min(scores) - 5, max(scores) + 5)
-            plt.plot(x, scores, marker='o', linestyle='-', color='b', linewidth=3, label='Scores')
-            plt.title(self.get_text('Lymphedema Score History'), pad = 20)
-            plt.xlabel(self.get_text('Test Number'))
-            plt.ylabel(self.get_text('Score'))
-            plt.grid(True)
-            for i in range(len(scores)):
-                plt.text(x[i], scores[i] + 0.4, str(round(scores[i],1)), fontsize=24, ha='center', va='bottom')
-
-        def create_buttons(self, pic_frame):
-            
-            custom_font = ctk.CTkFont(family="Helvetica", size=self.parent.fontsize)
-            recent_5_button = ctk.CTkButton(pic_frame, text=self.get_text("last 5 times"), command=show_recent_5, font=custom_font)
-            recent_5_button.grid(row=1, column = 0, pady = 20)
+    def get_recent_data(self, num=None):
+        return self.parent.store.load_scores(self.parent.current_user, last=num)
 
-            recent_10_button = ctk.CTkButton(pic_frame, text=self.get_text("last 10 times"), command=show_recent_10, font=custom_font)
-            recent_10_button.grid(row=1, column = 1)
+    def update_plot(self, data):
+        self.canvas_.update(data)
+        # the new series' full view becomes the toolbar's home view
+        self.toolbar.update()
 
-            recent_20_button = ctk.CTkButton(pic_frame, text=self.get_text("last 20 times"), command=show_recent_20, font=custom_font)
-            recent_20_button.grid(row=1, column = 2)
+    def show_recent(self, num=None):
+        self.update_plot(self.get_recent_data(num))
 
-            all_button = ctk.CTkButton(pic_frame, text=self.get_text("Overall"), command=show_all, font=custom_font)
-            all_button.grid(row=1, column = 3)
-        
-        def get_recent_data(data, num):
-            return data[-num:]
+    def create_buttons(self, pic_frame):
+        custom_font = ctk.CTkFont(family="Helvetica", size=self.parent.fontsize)
+        recent_5_button = self.parent.texts.bind(ctk.CTkButton(pic_frame, command=lambda: self.show_recent(5), font=custom_font), "last 5 times")
+        recent_5_button.grid(row=1, column = 0, pady = 20)
 
-        def show_recent_5():
-            recent_5_data = get_recent_data(score_list, 5)
-            update_plot(recent_5_data)
-            
-        def show_recent_10():
-            recent_10_data = get_recent_data(score_list, 10)
-            update_plot(recent_10_data)
+        recent_10_button = self.parent.texts.bind(ctk.CTkButton(pic_frame, command=lambda: self.show_recent(10), font=custom_font), "last 10 times")
+        recent_10_button.grid(row=1, column = 1)
 
-        def show_recent_20():
-            recent_20_data = get_recent_data(score_list, 20)
-            update_plot(recent_20_data)
-            
-        def show_all():
-            update_plot(score_list)
+        recent_20_button = self.parent.texts.bind(ctk.CTkButton(pic_frame, command=lambda: self.show_recent(20), font=custom_font), "last 20 times")
+        recent_20_button.grid(row=1, column = 2)
 
-        def update_plot(data):
-            plt.figure(num=3).clear()  # 清除之前的图表
-            plot_scores(data)
-            self.canvas_.draw()
+        all_button = self.parent.texts.bind(ctk.CTkButton(pic_frame, command=lambda: self.show_recent(None), font=custom_font), "Overall")
+        all_button.grid(row=1, column = 3)
 
-        scores = score_list[-5:]
-        plot_scores(scores)
-        plt.tight_layout()
+    def create_figure2(self):
         pic_frame = ctk.CTkFrame(self, fg_color='white', bg_color='white')
         pic_frame.grid(row=1, column=0, pady=20, sticky="ew")
         pic_frame.columnconfigure(0, weight=1)
@@ -709,11 +618,18 @@ class Pagehistory(ctk.CTkFrame):
         pic_frame.rowconfigure(0, weight=1)
         pic_frame.rowconfigure(1, weight=0)
 
-        self.canvas_ = FigureCanvasTkAgg(plt.figure(num=3), pic_frame)
-        self.canvas_.draw()
+        self.canvas_ = charts.HistoryChart(pic_frame, lambda: self.parent.lang, self.get_text('Lymphedema Score History'),
+                                           self.get_text('Test Number'), self.get_text('Score'))
         self.canvas_.get_tk_widget().grid(row=0, column=0, columnspan=4, pady=20, sticky="ew")
-
-        create_buttons(self, pic_frame)
+        # zoom/pan changes the x limits, which makes the chart redraw that slice at full resolution
+        from matplotlib.backends.backend_tkagg import NavigationToolbar2Tk
+        self.toolbar = NavigationToolbar2Tk(self.canvas_, pic_frame, pack_toolbar=False)
+        self.toolbar.grid(row=2, column=0, columnspan=4, sticky="ew")
+        self.show_recent(5)
+        self.parent.texts.bind_figure(self.canvas_, lambda: [(self.canvas_.title, 'Lymphedema Score History'), (self.canvas_.xlabel, 'Test Number'),
+                                                             (self.canvas_.ylabel, 'Score')], lambda: self.parent.lang)
+
+        self.create_buttons(pic_frame)
         
 class Pagefactor(ctk.CTkFrame):
     def __init__(self, parent):
@@ -733,40 +649,40 @@ class Pagefactor(ctk.CTkFrame):
     def construct(self):
         if not self.constructed:
             self.constructed = True
-        self.page_label = ctk.CTkLabel(self, text=self.get_text("Factor Analysis"), font=self.font)
+        self.page_label = self.parent.texts.bind(ctk.CTkLabel(self, font=self.font), "Factor Analysis")
         self.page_label.grid(row=0, column=0, columnspan=1, pady=25, sticky="ew")
 
         self.create_figure3()
-        self.back_button = ctk.CTkButton(self, text=self.get_text("return"), command=lambda: self.parent.show_frame("Pagechart"), font=self.font)
+        self.back_button = self.parent.texts.bind(ctk.CTkButton(self, command=lambda: self.parent.show_frame("Pagechart"), font=self.font), "return")
         self.back_button.grid(row=2, column=0, pady=20, sticky="ew")
 
-    def update_texts(self):
-        self.remove()
-        self.construct()
+    def refresh(self):
+        # a new score changes the patient's own factors
+        self.show_chart()
 
-    def remove(self):
-        plt.close('all')
-        for widget in self.winfo_children():
-            widget.destroy()
-        
-    def create_figure3(self):
-        plt.figure(num=4, figsize=(30, 15), dpi=80, facecolor="white", edgecolor='Teal', frameon=True)
-        plt.rcParams['font.sans-serif'] = ['SimHei']
-        plt.rcParams['axes.unicode_minus'] = False  # 解决负号显示问题
-        if self.parent.lang == 'Chinese':
-            font = {'family': 'SimHei', 'weight': 'normal', 'size': 26}
-        else:
-            font = {'family': 'serif', 'serif': 'Times New Roman', 'weight': 'normal', 'size': 26}
-        plt.rc('font', **font)
-        
-        plt.title(self.get_text('Important factors contributing to Lymphedema'), pad=20, fontsize=36)
-        plt.xscale('symlog', linthresh=0.00005)
-        plt.tick_params(axis='y', labelsize=18)
-        font_prop = FontProperties(family='Times New Roman')
-        plt.tick_params(axis='x', labelsize=18)
-        for label in plt.gca().get_xticklabels():
-            label.set_fontproperties(font_prop)
+    def chart_factors(self):
+        """Title, axis label, (translated factor, value) bars and whether the values are signed.
+
+        After a questionnaire has been scored these are the patient's own
+        drivers: exact SHAP contributions of each model input to the log-odds
+        of the highest versus the lowest risk band. Before that, and if the
+        model cannot be explained, the global importances are shown.
+        """
+        if self.parent.y_pred is not None:
+            try:
+                explainer = attribution.get_explainer(self.parent.inference.model_path)
+            except (OSError, TypeError, ValueError):
+                explainer = None
+            if explainer is not None:
+                features = [float(value) for value in scoring.select_features(self.parent.output_labels)]
+                contributions = attribution.risk_contributions(explainer.explain_one(features))
+                ranked = sorted(zip(SELECT_MASK, contributions), key=lambda item: -abs(item[1]))
+                factors = [(self.get_text(FACTOR_KEYS[name]), round(float(value), 4)) for name, value in ranked]
+                return self.get_text('Factors behind your score'), self.get_text('Push towards higher risk (log-odds)'), factors, True
+        factors = [(self.get_text(key), value) for key, value in self.factors]
+        return self.get_text('Important factors contributing to Lymphedema'), None, factors, False
 
+    def create_figure3(self):
         data = [('Arm or hand swelling', 0.5666504441537034), ('Symptom severity', 0.32829106757634513), 
                 ('Breast swelling', 0.05866949630997336), ('time lapse since last surgery', 0.0270874570016606), 
                 ('Height and weight (BMI)', 0.0048442873079247665), ('Tightness, firmness, and heaviness', 0.003799860520333767), 
@@ -777,26 +693,74 @@ class Pagefactor(ctk.CTkFrame):
                 ('ChestWall swelling', 0.0001060488637141992), ('Lumpectomy', 2.9960955692536147e-05), 
                 ('Chemotherapy', 1.3416562172188665e-05), ('Mastectomy', 1.1256321151464536e-05)]
         
-        data = [(self.get_text(value1), value2) for value1, value2 in data]
-        x = [item[0] for item in data]
-        y = [item[1] for item in data]
-        loc = zip(x, y)
-        plt.xlim(0, 1)
-        plt.barh(x, y, facecolor='Teal')
-        plt.xticks(fontsize=24)
-        plt.yticks(fontsize=24)
-        plt.gca().invert_yaxis()  # 反转纵轴顺序
-        for x, y in loc:
-            plt.text((1+0.03)*y, x, '%.1g' % y)
-
-        plt.tight_layout()
-        plt.subplots_adjust(left=0.255, right=0.9, top=0.91, bottom=0.08)
-
-        self.canvas = FigureCanvasTkAgg(plt.figure(num=4), self)
-        self.canvas.draw()
-        self.canvas.get_tk_widget().grid(row=1, column=0, pady=20, sticky="ew")
-
-        
+        self.factors = data
+        self.chart_image = None
+        self.chart_key = None
+        self.failed_chart = None
+        self.render_thread = None
+        self.resize_job = None
+        self.chart_label = tk.Label(self, bg='white')
+        self.chart_label.grid(row=1, column=0, pady=20, sticky="nsew")
+        self.parent.texts.bind_callback(self.chart_label, self.show_chart)
+        self.bind('<Configure>', self.on_resize)
+        self.show_chart()
+
+    def on_resize(self, event):
+        if self.resize_job is not None:
+            self.after_cancel(self.resize_job)
+        self.resize_job = self.after(300, self.show_chart)
+
+    def chart_size(self):
+        width = self.winfo_width() if self.winfo_width() > 1 else self.parent.winfo_width()
+        # steps of 100 px so small resizes reuse the cached image
+        width = max(600, (width - 40) // 100 * 100)
+        return width, width // 2
+
+    def show_chart(self):
+        # the chart is rendered off the Tk thread and shown as an image; the global importances
+        # are cached on disk per language and width, a patient's own contributions (health
+        # data) are only kept in memory
+        self.resize_job = None
+        width, height = self.chart_size()
+        title, xlabel, factors, signed = self.chart_factors()
+        if signed:
+            path = None
+            key = (self.parent.lang, width, height, title, tuple(factors), xlabel)
+        else:
+            path = key = charts.factor_chart_path(os.path.join(user_cache_dir(), 'charts'), self.parent.lang, width, height, title, factors, xlabel)
+        if key in (self.chart_key, self.failed_chart):
+            return
+        if path is not None and os.path.exists(path):
+            self.set_chart(key, tk.PhotoImage(file=path))
+            return
+        self.wanted_chart = (key, (path, self.parent.lang, title, factors, width, height, xlabel, signed))
+        if self.render_thread is None:
+            args, result = self.wanted_chart[1], []
+            self.render_thread = threading.Thread(target=lambda: result.append(charts.render_factor_chart(*args)), daemon=True)
+            self.render_thread.key = key
+            self.render_thread.result = result
+            self.render_thread.start()
+            self.after(50, self.poll_render)
+
+    def set_chart(self, key, image):
+        self.chart_key = key
+        self.chart_image = image
+        self.chart_label.configure(image=self.chart_image)
+
+    def poll_render(self):
+        if self.render_thread.is_alive():
+            self.after(50, self.poll_render)
+            return
+        key, result = self.render_thread.key, self.render_thread.result
+        self.render_thread = None
+        if not result:
+            # the render raised (reported on stderr by the thread); do not retry the same key
+            self.failed_chart = key
+        elif key == self.wanted_chart[0]:
+            rendered = result[0]
+            self.set_chart(key, tk.PhotoImage(file=rendered) if isinstance(rendered, str) else tk.PhotoImage(data=rendered))
+        # starts rendering the key that was requested meanwhile, if any
+        self.show_chart()
 
 class Pagechart(ctk.CTkFrame):
     def __init__(self, parent):
@@ -808,18 +772,20 @@ class Pagechart(ctk.CTkFrame):
     def construct(self):
         if not self.constructed:
             self.constructed = True
-        self.page_label = ctk.CTkLabel(self, text=self.parent.get_text("visualized diagnosis"), font=self.font)
-        self.page_label.grid(row=0, column=0, columnspan=3, pady=20, sticky="nsew")
+        self.page_label = self.parent.texts.bind(ctk.CTkLabel(self, font=self.font), "visualized diagnosis")
+        self.page_label.grid(row=0, column=0, columnspan=4, pady=20, sticky="nsew")
         self.plot_frame = PLOTFrame(self, font=self.font, get_text=self.parent.get_text, fg_color = 'white', height=600)
-        self.plot_frame.grid(row=1, column=0, padx=10, columnspan=3, pady=(10, 0), sticky="nsew")
-        self.history_button = ctk.CTkButton(self, text=self.parent.get_text("History"), command=lambda: self.parent.show_frame("Pagehistory"), font=self.font)
+        self.plot_frame.grid(row=1, column=0, padx=10, columnspan=4, pady=(10, 0), sticky="nsew")
+        self.history_button = self.parent.texts.bind(ctk.CTkButton(self, command=lambda: self.parent.show_frame("Pagehistory"), font=self.font), "History")
         self.history_button.grid(row=2, column=0, padx=10, pady=(15, 20), sticky="ew")
-        self.factor_button = ctk.CTkButton(self, text=self.parent.get_text("Factor Analysis"), command=lambda: self.parent.show_frame("Pagefactor"), font=self.font)
+        self.factor_button = self.parent.texts.bind(ctk.CTkButton(self, command=lambda: self.parent.show_frame("Pagefactor"), font=self.font), "Factor Analysis")
         self.factor_button.grid(row=2, column=1, padx=10, pady=(15, 20), sticky="ew")
-        self.back_button = ctk.CTkButton(self, text=self.parent.get_text("return"), command=lambda: self.parent.show_frame("Page2"), font=self.font)
-        self.back_button.grid(row=2, column=2, padx=10, pady=(15, 20), sticky="ew")
+        self.whatif_button = self.parent.texts.bind(ctk.CTkButton(self, command=lambda: self.parent.show_frame("Pagewhatif"), font=self.font), "What if")
+        self.whatif_button.grid(row=2, column=2, padx=10, pady=(15, 20), sticky="ew")
+        self.back_button = self.parent.texts.bind(ctk.CTkButton(self, command=lambda: self.parent.show_frame("Page2"), font=self.font), "return")
+        self.back_button.grid(row=2, column=3, padx=10, pady=(15, 20), sticky="ew")
 
-        self.update_texts()
+        self.plot_frame.construct()
 
     def configure_grid(self):
         self.grid_rowconfigure(0, weight=0)
@@ -828,15 +794,120 @@ class Pagechart(ctk.CTkFrame):
         self.grid_columnconfigure(0, weight=1)
         self.grid_columnconfigure(1, weight=1)
         self.grid_columnconfigure(2, weight=1)
+        self.grid_columnconfigure(3, weight=1)
 
-    def update_texts(self):
-        self.page_label.configure(text=self.parent.get_text("visualized diagnosis"))
-        self.back_button.configure(text=self.parent.get_text("return"))
-        self.plot_frame.update_texts()
+    def refresh(self):
+        self.plot_frame.refresh()
 
-    def remove(self):
-        for widget in self.winfo_children():
-            widget.destroy()
+class Pagewhatif(ctk.CTkFrame):
+    """Move one answer with a slider and see the score and every single-step what-if around it.
+
+    Each slider step rescores the answers and all their single-step
+    changes in one batched model call (about a millisecond) and updates the
+    sensitivity chart in place, so the slider drives it live.
+    """
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.parent = parent
+        self.font = self.parent.font_list[0]
+        self.constructed = False
+        self.get_text = self.parent.get_text
+        self.data_version = None
+
+    def configure_grid(self):
+        self.grid_rowconfigure(0, weight=0)
+        self.grid_rowconfigure(1, weight=0)
+        self.grid_rowconfigure(2, weight=1)
+        self.grid_rowconfigure(3, weight=0)
+        self.grid_columnconfigure(0, weight=1)
+
+    def construct(self):
+        if not self.constructed:
+            self.constructed = True
+        self.page_label = self.parent.texts.bind(ctk.CTkLabel(self, font=self.font), "What if")
+        self.page_label.grid(row=0, column=0, pady=25, sticky="ew")
+
+        controls = ctk.CTkFrame(self, fg_color='transparent')
+        controls.grid(row=1, column=0, padx=20, sticky="ew")
+        controls.grid_columnconfigure(1, weight=1)
+        self.field_menu = ctk.CTkOptionMenu(controls, font=self.font, dropdown_font=self.font, command=self.on_field)
+        self.field_menu.grid(row=0, column=0, padx=10, pady=10, sticky="w")
+        self.slider = ctk.CTkSlider(controls, command=self.on_slide)
+        self.slider.grid(row=0, column=1, padx=10, pady=10, sticky="ew")
+        self.value_label = ctk.CTkLabel(controls, font=self.font, width=160)
+        self.value_label.grid(row=0, column=2, padx=10, pady=10)
+        self.score_label = ctk.CTkLabel(controls, font=self.font)
+        self.score_label.grid(row=1, column=0, columnspan=3, padx=10, sticky="w")
+
+        self.chart = charts.SensitivityChart(self, lambda: self.parent.lang, self.get_text('Change in score'))
+        self.chart.get_tk_widget().grid(row=2, column=0, padx=20, pady=10, sticky="nsew")
+        self.parent.texts.bind_figure(self.chart, lambda: [(self.chart.xlabel, 'Change in score')], lambda: self.parent.lang,
+                                      extra=self.update_view)
+        self.parent.texts.bind_callback(self.field_menu, self.update_field_names)
+        self.back_button = self.parent.texts.bind(ctk.CTkButton(self, command=lambda: self.parent.show_frame("Pagechart"), font=self.font), "return")
+        self.back_button.grid(row=3, column=0, pady=20, sticky="ew")
+        self.field = RAW_FIELDS.index('Arm or hand swelling')
+        self.update_field_names()
+        self.refresh()
+
+    def refresh(self):
+        # start again from the last submitted answers when there are new ones
+        if self.data_version != self.parent.data_version:
+            self.data_version = self.parent.data_version
+            self.answers = OrderedDict(self.parent.labels)
+            self.original = None
+            self.select_field(self.field)
+
+    def update_field_names(self):
+        self.field_names = [self.get_text(key) for key in RAW_FIELDS]
+        self.field_menu.configure(values=self.field_names)
+        self.field_menu.set(self.field_names[self.field])
+
+    def on_field(self, name):
+        self.select_field(self.field_names.index(name))
+
+    def select_field(self, i):
+        self.field = i
+        low, high = FIELD_RANGES[i]
+        self.slider.configure(from_=low, to=high, number_of_steps=high - low)
+        value = self.answer_value(i)
+        self.slider.set(value if value is not None else low)
+        self.update_view()
+
+    def answer_value(self, i):
+        try:
+            return float(self.answers[RAW_FIELDS[i]])
+        except ValueError:
+            return None
+
+    def on_slide(self, value):
+        value = int(round(value))
+        if self.answer_value(self.field) != value:
+            self.answers[RAW_FIELDS[self.field]] = str(value)
+            self.update_view()
+
+    def format_answer(self, i, value):
+        name = FIELD_OPTION_SETS[i]
+        if name is None:
+            return '%g' % value
+        return self.parent.translations.to_label(self.parent.lang, name, str(int(value)))
+
+    def update_view(self):
+        value = self.answer_value(self.field)
+        self.value_label.configure(text=self.format_answer(self.field, value) if value is not None else '-')
+        try:
+            result = whatif.Sensitivity(load_model(self.parent.inference.model_path), self.answers)
+        except ValueError:
+            self.score_label.configure(text=self.get_text("Data not fully completed. Please fill in all required fields."))
+            self.chart.update([], [])
+            return
+        if self.original is None:
+            self.original = result.score
+        self.score_label.configure(text='%s: %.1f (%+.1f)' % (self.get_text('Score'), result.score, result.score - self.original))
+        labels = ['%s \u2192 %s' % (self.get_text(RAW_FIELDS[f]), self.format_answer(f, v))
+                  for f, v in zip(result.field[:len(self.chart.bars)], result.value[:len(self.chart.bars)])]
+        self.chart.update(labels, result.delta[:len(labels)])
 
 class PageLogin(ctk.CTkFrame):
     def __init__(self, parent):
@@ -846,35 +917,26 @@ class PageLogin(ctk.CTkFrame):
         self.construct()
 
     def construct(self):
-        self.label_username = ctk.CTkLabel(self, text="Username:", font=self.font)
+        self.label_username = self.parent.texts.bind(ctk.CTkLabel(self, font=self.font), "Username:")
         self.label_username.grid(row=0, column=1, padx=10, pady=50, sticky="e")
 
         self.entry_username = ctk.CTkEntry(self, font=self.font)
         self.entry_username.grid(row=0, column=2, padx=10, pady=10, sticky="w")
 
-        self.label_password = ctk.CTkLabel(self, text="Password:", font=self.font)
+        self.label_password = self.parent.texts.bind(ctk.CTkLabel(self, font=self.font), "Password:")
         self.label_password.grid(row=1, column=1, padx=10, pady=10, sticky="e")
 
         self.entry_password = ctk.CTkEntry(self, font=self.font)
         self.entry_password.grid(row=1, column=2, padx=10, pady=10, sticky="w")
 
-        self.button_login = ctk.CTkButton(self, text="Login", command=self.login, font=self.font)
+        self.button_login = self.parent.texts.bind(ctk.CTkButton(self, command=self.login, font=self.font), "Login")
         self.button_login.grid(row=2, column=1, columnspan=2, padx=20, pady=10)
 
-        self.button_register = ctk.CTkButton(self, text="Register", command=self.register, font=self.font)
+        self.button_register = self.parent.texts.bind(ctk.CTkButton(self, command=self.register, font=self.font), "Register")
         self.button_register.grid(row=3, column=1, columnspan=2, padx=10, pady=10)
         
-        self.back_button = ctk.CTkButton(self, text="return", command=lambda: self.parent.show_frame("Page1"), font=self.font)
+        self.back_button = self.parent.texts.bind(ctk.CTkButton(self, command=lambda: self.parent.show_frame("Page1"), font=self.font), "return")
         self.back_button.grid(row=4, column=1, columnspan=2, pady=10)
-
-        self.update_texts()
-
-    def update_texts(self):
-        self.label_username.configure(text=self.parent.get_text("Username:"))
-        self.label_password.configure(text=self.parent.get_text("Password:"))
-        self.button_login.configure(text=self.parent.get_text("Login"))
-        self.button_register.configure(text=self.parent.get_text("Register"))
-        self.back_button.configure(text=self.parent.get_text("return"))
     
     def configure_grid(self):
         for row in range(5):
@@ -885,8 +947,8 @@ class PageLogin(ctk.CTkFrame):
     def login(self):
         username = self.entry_username.get()
         password = self.entry_password.get()
-        userdata = load_user_data(self.parent.user_data_path)
-        if username in userdata and userdata[username] == password:
+        stored_password = self.parent.store.get_password(username)
+        if stored_password is not None and stored_password == password:
             self.parent.current_user = username
             # messagebox.showinfo(self.parent.get_text("Login"), self.parent.get_text("Login successful")) # !!!
             self.parent.update_login_label()
@@ -897,38 +959,44 @@ class PageLogin(ctk.CTkFrame):
     def register(self):
         username = self.entry_username.get()
         password = self.entry_password.get()
-        userdata = load_user_data(self.parent.user_data_path)
-        if username in userdata:
-            messagebox.showerror(self.parent.get_text("Register"), self.parent.get_text("Username already exists"))
-        elif username.strip() == '' or password.strip() == '':
+        if username.strip() == '' or password.strip() == '':
             messagebox.showerror(self.parent.get_text("Register"), self.parent.get_text("Invalid username or password: can NOT be empty."))
+        elif not self.parent.store.add_user(username, password):
+            messagebox.showerror(self.parent.get_text("Register"), self.parent.get_text("Username already exists"))
         else:
-            self.parent.user_data[username] = password
-            save_user_data(self.parent.user_data_path, self.parent.user_data)
             messagebox.showinfo(self.parent.get_text("Register"), self.parent.get_text("Registration successful, please login next."))
 
 class App(ctk.CTk):
     def __init__(self):
         super().__init__()
 
-        self.translations = load_translations(os.path.join(basepath, "data", "translations.json"))
+        self.translations = TranslationTables(load_translations(os.path.join(basepath, "data", "translations.json")))
+        self.texts = TextBinder(self.get_text)
+        self.tooltips = TooltipManager(self)
         self.user_data_path = os.path.join(basepath, "data", "user_data.json")
-        self.user_data = load_user_data(self.user_data_path)
         self.record_data_path = os.path.join(basepath, "data", "user_record.json")
-        with open(os.path.join(basepath, "data", "default.json"), "r") as json_file:
-            default = json.load(json_file)
-            self.lang = default['lang']
-            self.fontsize = default['fontsize']
+        self.store = RecordStore(os.path.join(basepath, "data", "records.db"))
+        self.store.migrate_from_json(self.user_data_path, self.record_data_path)
+        self.documents = JsonDocumentStore()
+        self.default_path = os.path.join(basepath, "data", "default.json")
+        default = self.documents.get(self.default_path)
+        self.lang = default['lang']
+        self.fontsize = default['fontsize']
         self.font_list = [("Helvetica", self.fontsize)]
         self.current_user = None
         self.y_pred = None
         self.score_save_flag = False
-        self.labels = OrderedDict({ 'Age (years)': '', 'Time Lapse (years)': '', 'Weight (Kg)': '', 'Height (cm)': '', 'Limited shoulder movement': "",\
-                                    'Limited elbow movement': "", 'Limited wrist movement': "", 'Limited fingers movement': "", 'Limited arm movement': "", 'Arm or hand swelling': "",\
-                                    'Breast swelling': "", 'Chest swelling': "", 'Toughness or thickness of skin': "", 'Pain, aching, soreness': "", 'Tightness': "", 'Firmness': "",\
-                                    'Heaviness': "", 'Numbness': "", 'Burning': "", 'Stabbing': "", 'Tingling': "", 'Fatigue': "", 'Weakness': "", 'Redness': "", 'Hotness': "",\
-                                    'Stiffness': "", 'Tenderness': "", 'Blister': "", 'Chemotherapy': '', 'Radiation': '', 'SLNB_Removed_LN': '', 'ALND_Removed_LN': '',\
-                                    'Mastectomy': '', 'Lumpectomy': '', 'Hormonal therapy': ''})  # the default value has been abandoned.
+        self.score_user = None
+        self.data_version = 0
+        self.inference = InferenceWorker(self, os.path.join(basepath, 'models', 'GBT.npz'))
+        # the cached answer vectors are health data: they only go to disk when asked for
+        prediction_cache_path = os.path.join(user_cache_dir(), 'predictions.json')
+        if '--persist-predictions' in sys.argv:
+            get_prediction_cache().attach_file(prediction_cache_path)
+        elif os.path.exists(prediction_cache_path):
+            # left by an earlier run that persisted the cache
+            os.remove(prediction_cache_path)
+        self.labels = OrderedDict((key, '') for key in RAW_FIELDS)  # the default value has been abandoned.
         self.instructions = ['Your age (years)', 'Time lapse since your recent breast cancer surgery (years)', 'Body weight (Kg)', 'Height (cm)', 'How much do you feel your shoulder movement is limited?', 'How much do you feel your elbow movement is limited?', 'How much do you feel your wrist movement is limited?', 'How much do you feel your fingers movement is limited?', 'How much do you feel your arm movement is limited?', 'How much do your arm or hand swell: if both, select the most intense feelings.', 'How much does your breast swell?', 'How much does your chest swell?', 'Toughness or thickness of skin', 'Do you feel pain, aching, or soreness: if more than one feeling, select the most intense one.', 'Tightness of your affected arm.', 'Firmness of your affected arm.', 'Heaviness of your affected arm.', 'Numbness of your affected arm.', 'The feeling of burning of your affected arm.', 'The feeling of stabbing of your affected arm.', 'The feeling of tingling, or feeling of needles of your affected arm.', 'The feeling of fatigue of your affected arm.', 'The feeling of weakness of your affected arm.', 'How much does your affected arm looks red?', 'How much does your affected arm feel hot?', 'How much does your affected arm feel stiff?', 'How much does your affected arm feel sensitive or tender when touching things?', 'Does you affected arm blisters?', 'Whether the patient had chemotherapy.', 'Whether the patient had radiation.', 'The number of removed sentinel lymph nodes.', 'The number of removed axillary lymph nodes', 'Whether the patient had Mastectomy.', 'Whether the patient had Lumpectomy.', 'Whether the patient had hormonal therapy.']
         self.output_labels = OrderedDict({'BMI': "22.1", 'Age': "40", 'TIME_LAPSE': "1", 'Mobility': "1", 'ArmSwelling': "0", 'BreastSwelling': "0", 'Skin': "0", 'PAS': "0", 'FHT': "1", 'DISCOMFORT': "0", 'SYM_COUNT': "2", 'ChestWallSwelling': "0", 'Chemotherapy': "1", 'Radiation': "0", 'Number_nodes': "1", 'Mastectomy': "1", 'Lumpectomy': "0", 'Hormonal': "0"})
         ctk.set_appearance_mode("light")
@@ -978,9 +1046,8 @@ class App(ctk.CTk):
             return
         dialog = PasswordDialog(self, font=self.font_list[0])
         self.wait_window(dialog)
-        user_data = load_user_data(self.user_data_path)
         password = dialog.password
-        if password == user_data[self.current_user]:
+        if password == self.store.get_password(self.current_user):
             answer = messagebox.askyesno(self.get_text('Confirmation'), self.get_text("Are you sure you want to delete this account? This operation can't be reversed."))
             if answer:
                 self.logdel()
@@ -990,14 +1057,11 @@ class App(ctk.CTk):
             messagebox.showerror(self.get_text("Delete Account"), self.get_text("Invalid password: your password is incorrect."))
 
     def set_font(self, num):
-        with open(os.path.join(basepath, "data", "default.json"), "r") as json_file:
-            existing_data = json.load(json_file)
-            existing_data['fontsize'] = num
-        with open(os.path.join(basepath, "data", "default.json"), 'w') as json_file:
-            json.dump(existing_data, json_file, indent=4)
+        self.documents.update(self.default_path, fontsize=num)
         answer = messagebox.askyesno(self.get_text("Restart"), self.get_text("Changing the fontsize will restart the system. Make sure the data is saved."))
         if answer:
             # 使用os.execl重启程序
+            self.documents.flush()  # execl skips atexit handlers
             python = sys.executable
             os.execl(python, python, *sys.argv)
         
@@ -1009,6 +1073,7 @@ class App(ctk.CTk):
         self.frames["Pagefactor"] = Pagefactor(self)
         self.frames["Pageabout"] = Pageabout(self)
         self.frames["Pagechart"] = Pagechart(self)
+        self.frames["Pagewhatif"] = Pagewhatif(self)
 
         for frame in self.frames.values():
             frame.grid(row=0, column=0, sticky="nsew")
@@ -1022,9 +1087,12 @@ class App(ctk.CTk):
                 messagebox.showinfo(self.get_text("Not login"), self.get_text("You're logged out now. Please register or login first."))
                 return
         frame = self.frames[page_name]
-        if hasattr(frame, "remove") and callable(getattr(frame, "remove")):
-            self.frames[page_name].remove()
-            self.frames[page_name].construct()
+        # pages are built on their first visit and afterwards only refreshed with new data
+        if hasattr(frame, "refresh") and callable(getattr(frame, "refresh")):
+            if not frame.constructed:
+                frame.construct()
+            else:
+                frame.refresh()
         frame.tkraise()
         frame.configure_grid()
 
@@ -1038,15 +1106,11 @@ class App(ctk.CTk):
             self.account_menu.add_command(label=self.get_text('You are logged out'))
 
     def get_text(self, key):
-        return get_translation(self.translations, self.lang, key)
+        return self.translations.get_text(self.lang, key)
 
     def set_language(self, lang):
         self.lang = lang.split(' ')[0]
-        with open(os.path.join(basepath, "data", "default.json"), "r") as json_file:
-            existing_data = json.load(json_file)
-            existing_data['lang'] = self.lang
-        with open(os.path.join(basepath, "data", "default.json"), 'w') as json_file:
-            json.dump(existing_data, json_file, indent=4)
+        self.documents.update(self.default_path, lang=self.lang)
         self.update_texts()
 
     def update_texts(self):
@@ -1073,37 +1137,32 @@ class App(ctk.CTk):
             self.account_menu.entryconfig(3, label=self.get_text("Login as: ") + self.current_user)
         else:
             self.account_menu.entryconfig(3, label=self.get_text("You are logged out"))
-        for key, frame in self.frames.items():
-            if hasattr(frame, "remove") and callable(getattr(frame, "remove")):
-                if hasattr(frame, "constructed") and not frame.constructed:
-                    continue
-                frame.remove()
-                frame.construct()
-            if hasattr(frame, "update_texts") and callable(getattr(frame, "update_texts")):
-                frame.update_texts()
+        # only widgets bound to a translation key are touched; no page is rebuilt
+        self.texts.retranslate()
 
     def show_instructions(self):
         # Function to display instructions
         tk.messagebox.showinfo(self.get_text("Instructions"), self.get_text("In the detection page, detailed instructions are shown when you move the cursor🖱️ close to the words (for example, Your age (years)...)."))
 
+    def end_session(self):
+        # a score still being computed or not yet saved belongs to the user who is leaving
+        self.inference.cancel()
+        self.score_save_flag = False
+        self.score_user = None
+        self.y_pred = None
+        self.data_version += 1
+        self.current_user = None
+
     def logout(self):
         messagebox.showinfo(self.get_text("Logout"), self.get_text("Logout sccessfully."))
-        self.current_user = None
+        self.end_session()
         self.update_login_label()
         self.show_frame("Page1")
         return
     
     def logdel(self):
-        data = load_user_data(self.user_data_path)
-        del data[self.current_user]
-        save_user_data(self.user_data_path, data)
-        data = load_user_data(self.record_data_path)
-        try:
-            del data[self.current_user]
-        except:
-            pass
-        save_user_data(self.record_data_path, data)
-        self.current_user = None
+        self.store.delete_user(self.current_user)
+        self.end_session()
         self.update_login_label()
         self.show_frame("Page1")
         return
@@ -1135,12 +1194,31 @@ class PasswordDialog(ctk.CTkToplevel):
 
 if __name__ == '__main__':
     global basepath
-    if getattr(sys, 'frozen', False) and hasattr(sys, '_MEIPASS'):
-        basepath = sys._MEIPASS
-    else:
-        basepath = os.path.abspath(".")
-    font_path = os.path.join(basepath, 'data', 'SimHei.ttf') # 替换为SimHei.ttf的实际路径
-    font_manager.fontManager.addfont(font_path)
-    app = App()
+    # the same directory movecat (e.g. the ingest daemon) uses, whatever the working directory
+    basepath = base_path()
+    with profiler.phase('App()'):
+        app = App()
     app.protocol("WM_DELETE_WINDOW", sys.exit)
+    # load what the other pages need while the user is logging in
+    warmup = Warmup([('numpy + scoring', lambda: __import__('scoring')),
+                     ('fonts', register_fonts),
+                     ('matplotlib', lambda: __import__('matplotlib.figure')),
+                     ('PIL', lambda: __import__('PIL.ImageTk')),
+                     ('model', lambda: load_model(os.path.join(basepath, 'models', 'GBT.npz')))])
+    def start_warmup():
+        profiler.mark('first window drawn')
+        warmup.start()
+    app.after_idle(start_warmup)
+    if profiler.enabled:
+        # report once the warm-up has finished, then exit
+        def report_when_warm():
+            if warmup.is_alive() or not warmup.ident:
+                app.after(50, report_when_warm)
+                return
+            profiler.mark('warm-up finished')
+            profiler.report()
+            for name, error in warmup.errors:
+                print('warm-up step %r failed: %r' % (name, error), file=sys.stderr)
+            app.destroy()
+        app.after(50, report_when_warm)
     app.mainloop()
\ No newline at end of file
@@ -0,0 +1,81 @@
+"""In-memory cache for the JSON documents under data/ with write-behind flushing."""
+import atexit
+import json
+import os
+import tempfile
+import threading
+
+
+class JsonDocumentStore:
+    """Parse each JSON file once and serve reads from memory.
+
+    Changes are coalesced: ``update``/``set`` only mark the document dirty and
+    (re)start a debounce timer; the file is rewritten atomically (temp file +
+    rename) when the timer fires, on ``flush()`` or at interpreter exit.
+    """
+
+    def __init__(self, delay=1.0):
+        self.delay = delay
+        self._lock = threading.RLock()
+        self._docs = {}
+        self._dirty = set()
+        self._timer = None
+        atexit.register(self.flush)
+
+    def get(self, path, default=None):
+        path = os.path.abspath(path)
+        with self._lock:
+            if path not in self._docs:
+                if os.path.exists(path):
+                    with open(path, "r", encoding="utf-8") as file:
+                        self._docs[path] = json.load(file)
+                else:
+                    self._docs[path] = {} if default is None else default
+            return self._docs[path]
+
+    def set(self, path, doc):
+        path = os.path.abspath(path)
+        with self._lock:
+            self._docs[path] = doc
+            self._mark_dirty(path)
+
+    def update(self, path, **changes):
+        with self._lock:
+            doc = self.get(path)
+            doc.update(changes)
+            self._mark_dirty(os.path.abspath(path))
+            return doc
+
+    def _mark_dirty(self, path):
+        self._dirty.add(path)
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(self.delay, self.flush)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def flush(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            while self._dirty:
+                path = self._dirty.pop()
+                _atomic_write_json(path, self._docs[path])
+
+
+def _atomic_write_json(path, data):
+    directory = os.path.dirname(path)
+    fd, tmp_path = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as file:
+            json.dump(data, file, indent=4)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
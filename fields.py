@@ -0,0 +1,30 @@
+"""Questionnaire field names and risk bands; kept free of numpy so the GUI can start without it."""
+
+# the 35 raw questionnaire fields, in App.labels order
+RAW_FIELDS = ['Age (years)', 'Time Lapse (years)', 'Weight (Kg)', 'Height (cm)', 'Limited shoulder movement',
+              'Limited elbow movement', 'Limited wrist movement', 'Limited fingers movement', 'Limited arm movement', 'Arm or hand swelling',
+              'Breast swelling', 'Chest swelling', 'Toughness or thickness of skin', 'Pain, aching, soreness', 'Tightness', 'Firmness',
+              'Heaviness', 'Numbness', 'Burning', 'Stabbing', 'Tingling', 'Fatigue', 'Weakness', 'Redness', 'Hotness',
+              'Stiffness', 'Tenderness', 'Blister', 'Chemotherapy', 'Radiation', 'SLNB_Removed_LN', 'ALND_Removed_LN',
+              'Mastectomy', 'Lumpectomy', 'Hormonal therapy']
+REQUIRED_FIELDS = RAW_FIELDS[:28]
+# answer list (i18n.OPTION_SETS) of each raw field; None for typed-in numbers
+FIELD_OPTION_SETS = [None] * 4 + ['severity'] * 24 + ['yes_no'] * 2 + [None] * 2 + ['yes_no'] * 3
+# plausible (min, max) answer of each raw field, for what-if steps
+FIELD_RANGES = [(18, 100), (0, 50), (30, 200), (130, 210)] + [(0, 4)] * 24 + [(0, 1)] * 2 + [(0, 60)] * 2 + [(0, 1)] * 3
+MOBILITY_FIELDS = ['Limited shoulder movement', 'Limited elbow movement', 'Limited wrist movement', 'Limited fingers movement', 'Limited arm movement']
+FHT_FIELDS = ['Firmness', 'Heaviness', 'Tightness']
+SYMPTOM_FIELDS = ['Limited shoulder movement', 'Limited elbow movement', 'Limited wrist movement', 'Limited fingers movement', 'Limited arm movement', 'Arm or hand swelling', 'Breast swelling', 'Chest swelling', 'Toughness or thickness of skin', 'Pain, aching, soreness', 'Tightness', 'Firmness', 'Heaviness', 'Numbness', 'Burning', 'Stabbing', 'Tingling', 'Fatigue', 'Weakness', 'Redness', 'Hotness', 'Stiffness', 'Tenderness', 'Blister']
+
+# derived features, in the order label_processing has always produced them
+OUTPUT_FIELDS = ['BMI', 'Age', 'TIME_LAPSE', 'Mobility', 'ArmSwelling', 'BreastSwelling', 'Skin', 'PAS', 'FHT', 'DISCOMFORT',
+                 'SYM_COUNT', 'ChestWallSwelling', 'Chemotherapy', 'Radiation', 'Number_nodes', 'Mastectomy', 'Lumpectomy', 'Hormonal']
+# model inputs, in the column order GBT.pkl was trained on
+SELECT_MASK = ['Mobility', 'ArmSwelling', 'BreastSwelling', 'Skin', 'FHT', 'DISCOMFORT',
+               'SYM_COUNT', 'ChestWallSwelling', 'Mastectomy', 'Lumpectomy', 'TIME_LAPSE']
+RISK_BANDS = {0: "low_risk", 1: "mild", 2: "moderate_severe"}
+# translation key the factor page shows for each model input
+FACTOR_KEYS = {'Mobility': 'Limited Mobility', 'ArmSwelling': 'Arm or hand swelling', 'BreastSwelling': 'Breast swelling',
+               'Skin': 'Toughness of skin', 'FHT': 'Tightness, firmness, and heaviness', 'DISCOMFORT': 'Discomfort',
+               'SYM_COUNT': 'Symptom severity', 'ChestWallSwelling': 'ChestWall swelling', 'Mastectomy': 'Mastectomy',
+               'Lumpectomy': 'Lumpectomy', 'TIME_LAPSE': 'time lapse since last surgery'}
@@ -0,0 +1,121 @@
+"""Translation tables and bindings: widgets register the key they show and are re-labelled in place."""
+import json
+import sys
+
+
+def figure_font_family(lang):
+    return 'SimHei' if lang == 'Chinese' else 'Times New Roman'
+
+
+class TextBinder:
+    """Keeps track of which widget shows which translation key.
+
+    ``retranslate()`` reconfigures only the bound widgets that still exist, so
+    a language switch does not destroy and rebuild any page.
+    """
+
+    def __init__(self, get_text):
+        self.get_text = get_text
+        self._bindings = []
+        self._callbacks = []
+
+    def bind(self, widget, key, option='text'):
+        widget.configure(**{option: self.get_text(key)})
+        self._bindings.append((widget, key, option))
+        return widget
+
+    def bind_callback(self, owner, callback):
+        # for text that is not a single key (option lists, figures, composed messages);
+        # the callback is dropped once ``owner`` has been destroyed
+        self._callbacks.append((owner, callback))
+
+    def bind_figure(self, canvas, artists, lang_getter, extra=None):
+        """Retitle a matplotlib figure in place on a language change.
+
+        ``artists`` returns the (Text, key) pairs currently on the figure; every
+        text artist also gets the language's font family. Nothing is re-plotted.
+        """
+        def retitle():
+            from matplotlib.text import Text
+            family = figure_font_family(lang_getter())
+            for artist, key in artists():
+                artist.set_text(self.get_text(key))
+            if extra is not None:
+                extra()
+            for text in canvas.figure.findobj(Text):
+                text.set_fontfamily(family)
+            canvas.draw_idle()
+        self.bind_callback(canvas.get_tk_widget(), retitle)
+
+    def retranslate(self):
+        self._bindings = [(widget, key, option) for widget, key, option in self._bindings if _alive(widget)]
+        for widget, key, option in self._bindings:
+            widget.configure(**{option: self.get_text(key)})
+        self._callbacks = [(owner, callback) for owner, callback in self._callbacks if _alive(owner)]
+        for owner, callback in self._callbacks:
+            callback()
+
+
+def _alive(widget):
+    try:
+        return bool(widget.winfo_exists())
+    except Exception:
+        return False
+
+
+def load_translations(*paths):
+    """Read one or more ``{language: {key: text}}`` files; later files override earlier ones."""
+    translations = {}
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as file:
+            for lang, table in json.load(file).items():
+                translations.setdefault(lang, {}).update(table)
+    return translations
+
+
+# answer choices of the questionnaire drop-downs, in ordinal order (English keys)
+OPTION_SETS = {
+    'severity': ('None', 'A little', 'Somewhat', 'Quite a bit', 'Severe'),
+    'yes_no': ('No', 'Yes'),
+}
+
+
+class TranslationTables:
+    """Translation lookups compiled once from the nested translation dicts.
+
+    Besides the key -> text table per language this builds, for every option
+    set, a reverse table from any language's label to its ordinal and a
+    forward table from ordinal to the label in each language, so converting a
+    drop-down value is one dict lookup and a new language needs no code.
+    """
+
+    def __init__(self, translations, option_sets=OPTION_SETS):
+        self.languages = tuple(translations)
+        self._text = {lang: {sys.intern(key): sys.intern(text) for key, text in table.items()}
+                      for lang, table in translations.items()}
+        self._ordinals = {}
+        self._labels = {}
+        for name, keys in option_sets.items():
+            reverse = {}
+            for ordinal, key in enumerate(keys):
+                ordinal = str(ordinal)
+                for label in {key} | {self.get_text(lang, key) for lang in self.languages}:
+                    if reverse.setdefault(label, ordinal) != ordinal:
+                        raise ValueError('option label %r is ambiguous in %r' % (label, name))
+            self._ordinals[name] = reverse
+            for lang in self.languages:
+                self._labels[lang, name] = {str(ordinal): self.get_text(lang, key) for ordinal, key in enumerate(keys)}
+            self._labels[None, name] = {str(ordinal): key for ordinal, key in enumerate(keys)}
+
+    def get_text(self, lang, key):
+        return self._text.get(lang, {}).get(key, key)
+
+    def labels(self, lang, name):
+        return list(self._labels.get((lang, name), self._labels[None, name]).values())
+
+    def to_ordinal(self, name, label):
+        """Ordinal (as a string) of ``label`` in option set ``name``; unknown labels are returned as is."""
+        return self._ordinals[name].get(label, label)
+
+    def to_label(self, lang, name, ordinal):
+        return self._labels.get((lang, name), self._labels[None, name]).get(ordinal, ordinal)
@@ -0,0 +1,69 @@
+"""Questionnaire scoring off the Tk thread, with results handed back through ``after()``."""
+from concurrent.futures import ThreadPoolExecutor
+
+from prediction_cache import get_prediction_cache
+
+
+def score_labels(model_path, labels):
+    """Label processing and (memoized) predict_proba for one questionnaire."""
+    from scoring import cal_overall_score, label_processing, select_features
+    output_labels = label_processing(labels)
+    y_pred = get_prediction_cache().predict_proba(model_path, [float(value) for value in select_features(output_labels)])
+    return {'output_labels': output_labels, 'y_pred': y_pred, 'overall_score': cal_overall_score(y_pred)}
+
+
+class InferenceWorker:
+    """Single background thread that scores submits; only the latest one counts.
+
+    Tk is not thread-safe, so the worker never touches widgets: the Tk thread
+    polls the pending future with ``widget.after`` and runs the callbacks
+    itself. Every submit bumps ``generation``; a result whose generation is no
+    longer current (a newer submit, or ``cancel()``) is dropped, and a job
+    that has not started yet is not run at all.
+    """
+
+    def __init__(self, widget, model_path, poll_ms=25):
+        self.widget = widget
+        self.model_path = model_path
+        self.poll_ms = poll_ms
+        self.generation = 0
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='inference')
+        self._pending = None
+
+    @property
+    def pending(self):
+        return self._pending is not None
+
+    def submit(self, labels, on_result, on_error=None):
+        self.cancel()
+        self.generation += 1
+        # copy: the questionnaire frame keeps mutating its labels dict
+        future = self._executor.submit(score_labels, self.model_path, labels.copy())
+        self._pending = (self.generation, future, on_result, on_error)
+        self.widget.after(self.poll_ms, self._poll, self.generation)
+        return self.generation
+
+    def cancel(self):
+        if self._pending is not None:
+            self._pending[1].cancel()
+            self._pending = None
+
+    def _poll(self, generation):
+        if self._pending is None or self._pending[0] != generation:
+            return
+        _, future, on_result, on_error = self._pending
+        if not future.done():
+            self.widget.after(self.poll_ms, self._poll, generation)
+            return
+        self._pending = None
+        error = future.exception()
+        if error is None:
+            on_result(future.result())
+        elif on_error is not None:
+            on_error(error)
+        else:
+            raise error
+
+    def shutdown(self):
+        self.cancel()
+        self._executor.shutdown(wait=False)
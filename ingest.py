@@ -0,0 +1,192 @@
+"""Ingestion of questionnaire files dropped by intake kiosks: ``python -m movecat ingest INBOX``.
+
+Each file holds one questionnaire as JSON, in the shape Page2 saves as a
+user's suggestions (the 35 ``App.labels`` fields, optionally wrapped in a
+``suggestions`` key), and is named ``<user>__<anything>.json``. Scored
+files are appended to the user's score history and moved to the
+processed directory; files that cannot be scored go to the rejected
+directory with a ``.error.txt`` note next to them.
+
+The inbox itself is the queue: every cycle takes at most ``batch_size``
+files (oldest first) and scores them with one ``score_batch`` call on the
+one loaded model, so a burst of thousands of files waits on disk instead
+of in memory. inotify (Linux) or polling only wakes the loop up.
+"""
+import ctypes
+import ctypes.util
+import json
+import os
+import select
+import shutil
+import sys
+import time
+
+from model_registry import load_model
+from scoring import score_batch
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+
+
+class InotifyWaiter:
+    """Blocks until files are closed after writing or moved into ``directory``."""
+
+    def __init__(self, directory):
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), IN_CLOSE_WRITE | IN_MOVED_TO) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, 'inotify_add_watch failed for %s' % directory)
+
+    def wait(self, timeout):
+        select.select([self.fd], [], [], timeout)
+        # the events only wake the loop up; drain them so they do not pile up
+        try:
+            while os.read(self.fd, 65536):
+                pass
+        except BlockingIOError:
+            pass
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollWaiter:
+    def wait(self, timeout):
+        time.sleep(timeout)
+
+    def close(self):
+        pass
+
+
+def make_waiter(directory, use_inotify=True):
+    if use_inotify and sys.platform.startswith('linux'):
+        try:
+            return InotifyWaiter(directory)
+        except (OSError, AttributeError):
+            pass
+    return PollWaiter()
+
+
+def user_of(name):
+    """The user a dropped file belongs to: the part of its name before ``__``."""
+    user, sep, _ = name.partition('__')
+    return user if sep and user else None
+
+
+class Ingestor:
+    """Validates, scores and files the questionnaires found in ``inbox``.
+
+    A file that is not valid JSON yet and was modified less than
+    ``settle_s`` ago is assumed to be still being written and is left for a
+    later cycle. Scores are appended before the file is moved, so a crash in
+    between can record one questionnaire twice but never loses one.
+    """
+
+    def __init__(self, store, model_path, inbox, processed=None, rejected=None, batch_size=64, settle_s=5.0):
+        self.store = store
+        self.model = load_model(model_path)
+        self.inbox = inbox
+        self.processed = processed or os.path.join(inbox, 'processed')
+        self.rejected = rejected or os.path.join(inbox, 'rejected')
+        self.batch_size = batch_size
+        self.settle_s = settle_s
+        self.n_scored = 0
+        self.n_rejected = 0
+        self.n_settling = 0
+        for directory in (self.processed, self.rejected):
+            os.makedirs(directory, exist_ok=True)
+
+    def pending(self):
+        """Up to ``batch_size`` of the oldest .json files in the inbox."""
+        with os.scandir(self.inbox) as entries:
+            files = [(entry.stat().st_mtime, entry.name) for entry in entries
+                     if entry.is_file() and entry.name.endswith('.json') and not entry.name.startswith('.')]
+        files.sort()
+        return files[:self.batch_size]
+
+    def run_once(self):
+        """Process one batch; returns the number of files taken out of the inbox.
+
+        ``n_settling`` is left at the number of files skipped as still being written.
+        """
+        now = time.time()
+        rows, accepted = [], []
+        taken = 0
+        self.n_settling = 0
+        for mtime, name in self.pending():
+            path = os.path.join(self.inbox, name)
+            user = user_of(name[:-len('.json')])
+            if user is None or self.store.get_password(user) is None:
+                self.reject(name, 'unknown user %r (expected <user>__<name>.json)' % user)
+                taken += 1
+                continue
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    labels = json.load(f)
+            except FileNotFoundError:
+                continue
+            except (ValueError, UnicodeDecodeError) as error:
+                if now - mtime < self.settle_s:
+                    self.n_settling += 1
+                    continue
+                self.reject(name, 'not a JSON questionnaire: %s' % error)
+                taken += 1
+                continue
+            if isinstance(labels, dict) and isinstance(labels.get('suggestions'), dict):
+                labels = labels['suggestions']
+            if not isinstance(labels, dict):
+                self.reject(name, 'expected a JSON object of questionnaire answers')
+                taken += 1
+                continue
+            rows.append(labels)
+            accepted.append((name, user, mtime))
+        if rows:
+            result = score_batch(self.model, rows)
+            for i, (name, user, mtime) in enumerate(accepted):
+                if result['error'][i] is not None:
+                    self.reject(name, result['error'][i])
+                else:
+                    self.store.append_score(user, float(result['overall_score'][i]), result['proba'][i], timestamp=mtime)
+                    self.move(name, self.processed)
+                    self.n_scored += 1
+                taken += 1
+        return taken
+
+    def reject(self, name, reason):
+        target = self.move(name, self.rejected)
+        if target is not None:
+            with open(target + '.error.txt', 'w', encoding='utf-8') as f:
+                f.write(reason + '\n')
+        self.n_rejected += 1
+
+    def move(self, name, directory):
+        target = os.path.join(directory, name)
+        if os.path.exists(target):
+            stem, ext = os.path.splitext(name)
+            target = os.path.join(directory, '%s.%d%s' % (stem, time.time_ns(), ext))
+        try:
+            shutil.move(os.path.join(self.inbox, name), target)
+        except FileNotFoundError:
+            return None
+        return target
+
+    def run(self, waiter, poll_interval=2.0, once=False, log=None):
+        """Process batches until the inbox is empty, then wait for new files.
+
+        With ``once``, returns once every file has been scored or rejected,
+        waiting for the ones that are still being written.
+        """
+        while True:
+            taken = self.run_once()
+            if taken:
+                if log is not None:
+                    log('ingested %d files (%d scored, %d rejected so far)' % (taken, self.n_scored, self.n_rejected))
+                continue
+            if once and not self.n_settling:
+                return
+            # wakes on inotify events; the timeout re-checks files still settling (and is the polling interval)
+            waiter.wait(poll_interval)
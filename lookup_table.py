@@ -0,0 +1,141 @@
+"""Precomputed probability table over the model's split buckets.
+
+A tree ensemble only looks at an input through comparisons with its split
+thresholds, so every feature can be cut into buckets at those thresholds
+and all inputs in one cell of the bucket grid get identical predictions.
+``compile_table`` evaluates the model once per cell; ``LookupTable`` then
+scores by bucketing the inputs and indexing the table.
+"""
+import hashlib
+
+import numpy as np
+
+FORMAT_VERSION = 1
+
+
+def _float32_floor(value):
+    # largest float32 <= value
+    f = np.float32(value)
+    return np.nextafter(f, np.float32(-np.inf)) if f > value else f
+
+def _float32_above(value):
+    # smallest float32 > value
+    f = np.float32(value)
+    return np.nextafter(f, np.float32(np.inf)) if f <= value else f
+
+
+def split_points(ensemble):
+    """Sorted distinct thresholds per feature of a TreeEnsemble."""
+    return [np.unique(ensemble.threshold[ensemble.feature == f]) for f in range(ensemble.n_features_in_)]
+
+def representatives(thresholds):
+    """Two float32-representable inputs per bucket: the lowest and the highest.
+
+    Bucket i holds the inputs x with thresholds[i-1] < x <= thresholds[i];
+    the open ends are represented by points one unit past the outer
+    thresholds.
+    """
+    low, high = [], []
+    for i in range(len(thresholds) + 1):
+        lo = _float32_above(thresholds[i - 1]) if i > 0 else None
+        hi = _float32_floor(thresholds[i]) if i < len(thresholds) else None
+        if lo is None:
+            lo = np.float32(hi - 1) if hi is not None else np.float32(0)
+        if hi is None:
+            hi = np.float32(lo + 1) if i > 0 else np.float32(0)
+        if lo > hi:
+            raise ValueError('bucket %d between %r and %r holds no float32 value' % (i, thresholds[i - 1], thresholds[i]))
+        low.append(lo)
+        high.append(hi)
+    return np.array(low, dtype=np.float64), np.array(high, dtype=np.float64)
+
+
+def _cell_inputs(points, shape, start, stop):
+    index = np.unravel_index(np.arange(start, stop), shape)
+    return np.column_stack([p[i] for p, i in zip(points, index)])
+
+def compile_table(ensemble, source_sha256='', chunk_size=65536):
+    """Evaluate ``ensemble`` at one input per cell; returns a LookupTable."""
+    thresholds = split_points(ensemble)
+    shape = tuple(len(t) + 1 for t in thresholds)
+    low = [representatives(t)[0] for t in thresholds]
+    n_cells = int(np.prod(shape))
+    proba = np.empty((n_cells, len(ensemble.classes_)))
+    for start in range(0, n_cells, chunk_size):
+        stop = min(start + chunk_size, n_cells)
+        proba[start:stop] = ensemble.predict_proba(_cell_inputs(low, shape, start, stop))
+    return LookupTable(thresholds, proba, ensemble.classes_, source_sha256)
+
+
+class LookupTable:
+    """predict_proba by array indexing over the bucket grid."""
+
+    def __init__(self, thresholds, proba, classes, source_sha256=''):
+        self.thresholds = [np.asarray(t, dtype=np.float64) for t in thresholds]
+        self.shape = tuple(len(t) + 1 for t in self.thresholds)
+        self.proba = np.asarray(proba, dtype=np.float64)
+        if self.proba.shape[0] != int(np.prod(self.shape)):
+            raise ValueError('table has %d rows, bucket grid has %d cells' % (self.proba.shape[0], int(np.prod(self.shape))))
+        self.classes_ = np.asarray(classes)
+        self.n_features_in_ = len(self.thresholds)
+        self.source_sha256 = str(source_sha256)
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            np.savez(f, format_version=np.int32(FORMAT_VERSION), source_sha256=np.str_(self.source_sha256),
+                     classes=self.classes_, proba=self.proba,
+                     threshold=np.concatenate(self.thresholds) if self.thresholds else np.zeros(0),
+                     n_thresholds=np.array([len(t) for t in self.thresholds], dtype=np.int64))
+
+    @classmethod
+    def load(cls, path_or_file):
+        with np.load(path_or_file, allow_pickle=False) as arrays:
+            version = int(arrays['format_version'])
+            if version != FORMAT_VERSION:
+                raise ValueError('unsupported lookup table format version %d (expected %d)' % (version, FORMAT_VERSION))
+            bounds = np.cumsum(arrays['n_thresholds'])[:-1]
+            return cls(np.split(arrays['threshold'], bounds), arrays['proba'], arrays['classes'], arrays['source_sha256'])
+
+    def cell_index(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError('expected an N x %d feature matrix, got shape %s' % (self.n_features_in_, X.shape))
+        # the trees compare float32-rounded inputs; x <= threshold stays in the lower bucket
+        X = X.astype(np.float32).astype(np.float64)
+        buckets = [np.searchsorted(t, X[:, f], side='left') for f, t in enumerate(self.thresholds)]
+        return np.ravel_multi_index(buckets, self.shape)
+
+    def predict_proba(self, X):
+        return self.proba[self.cell_index(X)]
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+def verify_table(table, ensemble, chunk_size=65536):
+    """Check the table against ``ensemble.predict_proba`` and return the number of mismatching inputs.
+
+    Every cell is checked at both ends of its buckets (the lowest and the
+    highest float32 input it contains). Since no split falls inside a
+    bucket, this covers every input the table can receive. The comparison
+    is exact (bitwise equal probabilities), and the cell each end point is
+    bucketed into is checked too.
+    """
+    if [list(t) for t in table.thresholds] != [list(t) for t in split_points(ensemble)]:
+        raise ValueError('table thresholds do not match the model; recompile it')
+    mismatches = 0
+    ends = [representatives(t) for t in table.thresholds]
+    n_cells = int(np.prod(table.shape))
+    for points in ([lo for lo, hi in ends], [hi for lo, hi in ends]):
+        for start in range(0, n_cells, chunk_size):
+            stop = min(start + chunk_size, n_cells)
+            X = _cell_inputs(points, table.shape, start, stop)
+            expected = ensemble.predict_proba(X)
+            mismatches += int(np.count_nonzero((table.proba[start:stop] != expected).any(axis=1)))
+            mismatches += int(np.count_nonzero(table.cell_index(X) != np.arange(start, stop)))
+    return mismatches
+
+
+def file_sha256(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
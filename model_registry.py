@@ -0,0 +1,75 @@
+import hashlib
+import io
+import os
+import pickle
+import threading
+import time
+
+
+class ModelRegistry:
+    """Process-wide cache of loaded models, keyed by absolute path.
+
+    A cached model is reused for as long as the file's (mtime, size) stat
+    signature is unchanged; otherwise it is reloaded. Load and hit counts and
+    timings are kept in ``metrics`` so the saving can be inspected.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self.metrics = {'loads': 0, 'hits': 0, 'load_seconds': 0.0, 'last_load_seconds': None}
+
+    def get(self, path):
+        return self._entry(path)['model']
+
+    def _entry(self, path, count_hit=True):
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry['signature'] == signature:
+                if count_hit:
+                    self.metrics['hits'] += 1
+                return entry
+            start = time.perf_counter()
+            with open(path, 'rb') as f:
+                raw = f.read()
+            if path.endswith('.table.npz'):
+                # bucketed probability table compiled from an exported ensemble
+                from lookup_table import LookupTable
+                model = LookupTable.load(io.BytesIO(raw))
+            elif path.endswith('.npz'):
+                # exported tree ensemble: predicting needs numpy only, not sklearn
+                from tree_runtime import TreeEnsemble
+                model = TreeEnsemble.load(io.BytesIO(raw))
+            else:
+                model = pickle.loads(raw)
+            elapsed = time.perf_counter() - start
+            entry = self._entries[path] = {'model': model, 'signature': signature,
+                                           'sha256': hashlib.sha256(raw).hexdigest(), 'load_seconds': elapsed}
+            self.metrics['loads'] += 1
+            self.metrics['load_seconds'] += elapsed
+            self.metrics['last_load_seconds'] = elapsed
+            return entry
+
+    def fingerprint(self, path):
+        # sha256 of the file contents the cached model was loaded from; not counted as a hit,
+        # callers have usually just fetched the model itself
+        return self._entry(path, count_hit=False)['sha256']
+
+    def invalidate(self, path=None):
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(os.path.abspath(path), None)
+
+
+_registry = ModelRegistry()
+
+def get_registry():
+    return _registry
+
+def load_model(path):
+    return _registry.get(path)
@@ -0,0 +1,333 @@
+"""Command line entry point: ``python -m movecat score cohort.csv -o scores.csv``."""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+
+from model_registry import load_model
+from paths import base_path, model_path
+from scoring import RISK_BANDS, SELECT_MASK, score_batch
+
+OUTPUT_FIELDS = ['row', 'id', 'p_low_risk', 'p_mild', 'p_moderate_severe', 'overall_score', 'risk_band', 'error']
+EXPLAIN_FIELDS = ['row', 'id', 'expected'] + SELECT_MASK + ['error']
+
+
+def detect_format(path, fmt):
+    if fmt:
+        return fmt
+    ext = os.path.splitext(path)[1].lower()
+    if ext in ('.jsonl', '.ndjson', '.json'):
+        return 'jsonl'
+    return 'csv'
+
+def open_text(path, mode):
+    if path == '-':
+        return sys.stdin if mode == 'r' else sys.stdout
+    # an undecodable byte becomes U+FFFD, so it fails its own row instead of the whole run
+    return open(path, mode, newline='', encoding='utf-8', errors='replace' if mode == 'r' else 'strict')
+
+class BadRow(dict):
+    """Stands in for an input line that is not a JSON object; it is reported as a row error."""
+
+    def __init__(self, error):
+        super().__init__()
+        self.error = error
+
+def iter_rows(stream, fmt):
+    if fmt == 'csv':
+        for row in csv.DictReader(stream):
+            yield row
+    else:
+        for line in stream:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as error:
+                row = BadRow('invalid JSON: %s' % error)
+            if not isinstance(row, dict):
+                row = BadRow('expected a JSON object')
+            yield row
+
+def iter_batches(rows, batch_size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+class ResultWriter:
+    def __init__(self, stream, fmt, fieldnames=OUTPUT_FIELDS, header=True):
+        self.stream = stream
+        self.fmt = fmt
+        if fmt == 'csv':
+            self.writer = csv.DictWriter(stream, fieldnames=fieldnames)
+            if header:
+                self.writer.writeheader()
+
+    def write(self, record):
+        if self.fmt == 'csv':
+            self.writer.writerow(record)
+        else:
+            self.stream.write(json.dumps({k: v for k, v in record.items() if v != ''}) + '\n')
+
+def format_result(row_number, row, result, i):
+    record = dict.fromkeys(OUTPUT_FIELDS, '')
+    record['row'] = row_number
+    record['id'] = row.get('id', '')
+    if result['error'][i] is not None:
+        record['error'] = result['error'][i]
+        return record
+    for label, p in zip(RISK_BANDS.values(), result['proba'][i]):
+        record['p_' + label] = float(p)
+    record['overall_score'] = float(result['overall_score'][i])
+    record['risk_band'] = str(result['risk_band'][i])
+    return record
+
+def score_stream(rows, writer, model, batch_size, rows_before=0):
+    n_rows = n_errors = 0
+    for batch in iter_batches(rows, batch_size):
+        result = score_batch(model, batch)
+        for i, row in enumerate(batch):
+            if isinstance(row, BadRow):
+                result['error'][i] = row.error
+            n_rows += 1
+            if result['error'][i] is not None:
+                n_errors += 1
+            writer.write(format_result(rows_before + n_rows, row, result, i))
+    return n_rows, n_errors
+
+def cmd_score(args):
+    in_fmt = detect_format(args.input, args.input_format)
+    out_fmt = detect_format(args.output, args.output_format)
+    if args.workers > 1 or args.checkpoint:
+        return cmd_score_sharded(args, in_fmt, out_fmt)
+    model = load_model(args.model)
+    start = time.perf_counter()
+    src = open_text(args.input, 'r')
+    dst = open_text(args.output, 'w')
+    try:
+        n_rows, n_errors = score_stream(iter_rows(src, in_fmt), ResultWriter(dst, out_fmt), model, args.batch_size)
+    finally:
+        if src is not sys.stdin:
+            src.close()
+        if dst is not sys.stdout:
+            dst.close()
+    elapsed = time.perf_counter() - start
+    print('scored %d rows (%d errors) in %.2fs' % (n_rows, n_errors, elapsed), file=sys.stderr)
+    return 0
+
+def cmd_score_sharded(args, in_fmt, out_fmt):
+    from sharded import score_file
+    if args.input == '-' or args.output == '-':
+        print('--workers and --checkpoint need an input and an output file', file=sys.stderr)
+        return 2
+    if args.resume and not args.checkpoint:
+        print('--resume needs --checkpoint', file=sys.stderr)
+        return 2
+    start = time.perf_counter()
+    try:
+        n_rows, n_errors = score_file(args.input, args.output, in_fmt, out_fmt, args.model, max(args.workers, 1),
+                                      args.chunk_rows, args.batch_size, args.checkpoint, args.resume)
+    except ValueError as error:
+        print(error, file=sys.stderr)
+        return 2
+    elapsed = time.perf_counter() - start
+    print('scored %d rows (%d errors) in %.2fs on %d workers' % (n_rows, n_errors, elapsed, max(args.workers, 1)), file=sys.stderr)
+    return 0
+
+def explain_stream(rows, writer, explainer, batch_size):
+    import numpy as np
+    from attribution import risk_contributions
+    from scoring import derive_features, encode_rows, model_inputs
+    expected = float(risk_contributions(explainer.expected_value))
+    n_rows = n_errors = 0
+    for batch in iter_batches(rows, batch_size):
+        X, parsed = encode_rows(batch)
+        features, valid = derive_features(X)
+        ok = parsed & valid
+        contributions = {}
+        if ok.any():
+            contributions = dict(zip(np.flatnonzero(ok), risk_contributions(explainer.shap_values(model_inputs(features[ok])))))
+        for i, row in enumerate(batch):
+            n_rows += 1
+            record = dict.fromkeys(EXPLAIN_FIELDS, '')
+            record['row'] = n_rows
+            record['id'] = row.get('id', '')
+            if i in contributions:
+                record['expected'] = expected
+                record.update(zip(SELECT_MASK, contributions[i].tolist()))
+            else:
+                n_errors += 1
+                if isinstance(row, BadRow):
+                    record['error'] = row.error
+                else:
+                    record['error'] = 'non-numeric answer' if not parsed[i] else 'invalid answers'
+            writer.write(record)
+    return n_rows, n_errors
+
+def cmd_explain(args):
+    from attribution import get_explainer
+    in_fmt = detect_format(args.input, args.input_format)
+    out_fmt = detect_format(args.output, args.output_format)
+    explainer = get_explainer(args.model)
+    start = time.perf_counter()
+    src = open_text(args.input, 'r')
+    dst = open_text(args.output, 'w')
+    try:
+        n_rows, n_errors = explain_stream(iter_rows(src, in_fmt), ResultWriter(dst, out_fmt, EXPLAIN_FIELDS), explainer, args.batch_size)
+    finally:
+        if src is not sys.stdin:
+            src.close()
+        if dst is not sys.stdout:
+            dst.close()
+    elapsed = time.perf_counter() - start
+    print('explained %d rows (%d errors) in %.2fs' % (n_rows, n_errors, elapsed), file=sys.stderr)
+    return 0
+
+def cmd_serve(args):
+    from service import serve
+    serve(args.model, args.host, args.port, args.max_batch, args.max_latency_ms)
+    return 0
+
+def cmd_ingest(args):
+    from ingest import Ingestor, make_waiter
+    from storage import RecordStore
+    store = RecordStore(args.db)
+    # accounts that only exist in the legacy JSON files, as the app would import them at start-up
+    data_dir = os.path.dirname(os.path.abspath(args.db))
+    store.migrate_from_json(os.path.join(data_dir, 'user_data.json'), os.path.join(data_dir, 'user_record.json'))
+    ingestor = Ingestor(store, args.model, args.inbox, args.processed, args.rejected, args.batch_size, args.settle)
+    waiter = make_waiter(args.inbox, use_inotify=not args.poll)
+    print('watching %s (%s)' % (args.inbox, type(waiter).__name__), file=sys.stderr, flush=True)
+    try:
+        ingestor.run(waiter, args.poll_interval, once=args.once, log=lambda message: print(message, file=sys.stderr, flush=True))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        waiter.close()
+        store.close()
+    print('scored %d files, rejected %d' % (ingestor.n_scored, ingestor.n_rejected), file=sys.stderr)
+    return 0
+
+def cmd_export_model(args):
+    import pickle
+    import numpy as np
+    from tree_runtime import export_gbt, load_ensemble, max_abs_difference
+    with open(args.model, 'rb') as f:
+        model = pickle.load(f)
+    export_gbt(model, args.output)
+    ensemble = load_ensemble(args.output)
+    # inputs drawn from the split thresholds (and just either side of them) plus small integers
+    split = ensemble.threshold[ensemble.feature != -1]
+    candidates = np.unique(np.concatenate([split, np.nextafter(split, -np.inf), np.nextafter(split, np.inf), np.arange(-1, 31)]))
+    X = np.random.default_rng(0).choice(candidates, size=(args.check_rows, ensemble.n_features_in_))
+    difference = max_abs_difference(model, ensemble, X)
+    print('wrote %s: %d trees, %d nodes; max |predict_proba difference| over %d rows = %.3g'
+          % (args.output, ensemble.n_trees, len(ensemble.feature), len(X), difference), file=sys.stderr)
+    return 0 if difference <= args.tolerance else 1
+
+def cmd_compile_table(args):
+    from lookup_table import compile_table, file_sha256
+    from tree_runtime import load_ensemble
+    ensemble = load_ensemble(args.model)
+    start = time.perf_counter()
+    table = compile_table(ensemble, file_sha256(args.model))
+    table.save(args.output)
+    print('wrote %s: %d cells over buckets %s in %.1fs'
+          % (args.output, len(table.proba), 'x'.join(str(n) for n in table.shape), time.perf_counter() - start), file=sys.stderr)
+    if args.verify:
+        return cmd_verify_table(argparse.Namespace(table=args.output, model=args.model))
+    return 0
+
+def cmd_verify_table(args):
+    from lookup_table import LookupTable, file_sha256, verify_table
+    from tree_runtime import load_ensemble
+    table = LookupTable.load(args.table)
+    if table.source_sha256 != file_sha256(args.model):
+        print('%s was compiled from a different model than %s' % (args.table, args.model), file=sys.stderr)
+        return 1
+    start = time.perf_counter()
+    mismatches = verify_table(table, load_ensemble(args.model))
+    print('%s: %d mismatching inputs (checked both ends of every cell in %.1fs)'
+          % (args.table, mismatches, time.perf_counter() - start), file=sys.stderr)
+    return 0 if mismatches == 0 else 1
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='movecat', description='Lymphedema early detection tools.')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    score = sub.add_parser('score', help='score a CSV/JSONL file of raw questionnaire answers')
+    score.add_argument('input', help="input file with the 35 App.labels fields per row ('-' for stdin)")
+    score.add_argument('-o', '--output', default='-', help="output file (default: stdout)")
+    score.add_argument('--input-format', choices=['csv', 'jsonl'], help='default: from the file extension')
+    score.add_argument('--output-format', choices=['csv', 'jsonl'], help='default: from the file extension')
+    score.add_argument('--batch-size', type=int, default=4096, help='rows per predict_proba call')
+    score.add_argument('--model', default=model_path(), help='model file: exported .npz (default) or sklearn pickle')
+    score.add_argument('--workers', type=int, default=1, help='score chunks of the file on this many processes')
+    score.add_argument('--chunk-rows', type=int, default=50000, help='rows per chunk handed to a worker')
+    score.add_argument('--checkpoint', help='record progress in this file after every chunk')
+    score.add_argument('--resume', action='store_true', help='continue the job recorded in --checkpoint')
+    score.set_defaults(func=cmd_score)
+
+    explain = sub.add_parser('explain', help='per-patient factor attributions (exact TreeSHAP) for a CSV/JSONL file')
+    explain.add_argument('input', help="input file with the 35 App.labels fields per row ('-' for stdin)")
+    explain.add_argument('-o', '--output', default='-', help="output file (default: stdout)")
+    explain.add_argument('--input-format', choices=['csv', 'jsonl'], help='default: from the file extension')
+    explain.add_argument('--output-format', choices=['csv', 'jsonl'], help='default: from the file extension')
+    explain.add_argument('--batch-size', type=int, default=4096)
+    explain.add_argument('--model', default=model_path(), help='exported .npz model')
+    explain.set_defaults(func=cmd_explain)
+
+    serve = sub.add_parser('serve', help='local HTTP scoring service (POST /score, GET /metrics)')
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8765)
+    serve.add_argument('--max-batch', type=int, default=256, help='most questionnaires per predict_proba call')
+    serve.add_argument('--max-latency-ms', type=float, default=5.0, help='longest a request waits for its batch to fill')
+    serve.add_argument('--model', default=model_path(), help='model file: exported .npz (default), .table.npz or sklearn pickle')
+    serve.set_defaults(func=cmd_serve)
+
+    ingest = sub.add_parser('ingest', help='watch a folder for questionnaire files and add their scores to the users\' history')
+    ingest.add_argument('inbox', help='folder the kiosks drop <user>__<name>.json files into')
+    ingest.add_argument('--processed', help='where scored files go (default: INBOX/processed)')
+    ingest.add_argument('--rejected', help='where unusable files go, with an .error.txt note (default: INBOX/rejected)')
+    ingest.add_argument('--db', default=os.path.join(base_path(), 'data', 'records.db'), help='the app\'s record database')
+    ingest.add_argument('--batch-size', type=int, default=64, help='most files read and scored per cycle')
+    ingest.add_argument('--poll-interval', type=float, default=2.0, help='seconds between scans without inotify')
+    ingest.add_argument('--settle', type=float, default=5.0, help='seconds a half-written file is waited for')
+    ingest.add_argument('--poll', action='store_true', help='poll even where inotify is available')
+    ingest.add_argument('--once', action='store_true', help='empty the inbox and exit')
+    ingest.add_argument('--model', default=model_path(), help='model file: exported .npz (default), .table.npz or sklearn pickle')
+    ingest.set_defaults(func=cmd_ingest)
+
+    export = sub.add_parser('export-model', help='flatten the pickled sklearn model into the sklearn-free .npz format')
+    export.add_argument('--model', default=model_path('GBT.pkl'), help='pickled GradientBoostingClassifier')
+    export.add_argument('-o', '--output', default=model_path(), help='.npz file to write')
+    export.add_argument('--check-rows', type=int, default=100000, help='random rows compared against sklearn predict_proba')
+    export.add_argument('--tolerance', type=float, default=1e-9)
+    export.set_defaults(func=cmd_export_model)
+
+    compile_ = sub.add_parser('compile-table', help='precompute predict_proba over the bucket grid of the split thresholds')
+    compile_.add_argument('--model', default=model_path(), help='exported .npz model')
+    compile_.add_argument('-o', '--output', default=model_path('GBT.table.npz'))
+    compile_.add_argument('--verify', action='store_true', help='run verify-table afterwards')
+    compile_.set_defaults(func=cmd_compile_table)
+
+    verify = sub.add_parser('verify-table', help='check a compiled table against the model it was built from')
+    verify.add_argument('table')
+    verify.add_argument('--model', default=model_path(), help='exported .npz model')
+    verify.set_defaults(func=cmd_verify_table)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,22 @@
+import os
+import sys
+
+
+def base_path():
+    # PyInstaller bundles unpack data/ and models/ under sys._MEIPASS
+    if getattr(sys, 'frozen', False) and hasattr(sys, '_MEIPASS'):
+        return sys._MEIPASS
+    return os.path.dirname(os.path.abspath(__file__))
+
+def model_path(name='GBT.npz'):
+    return os.path.join(base_path(), 'models', name)
+
+def user_cache_dir(app_name='Movecat'):
+    # per-user, writable even when the app runs from a read-only bundle
+    if sys.platform == 'win32':
+        root = os.environ.get('LOCALAPPDATA') or os.path.expanduser('~')
+        return os.path.join(root, app_name, 'Cache')
+    if sys.platform == 'darwin':
+        return os.path.join(os.path.expanduser('~/Library/Caches'), app_name)
+    root = os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache')
+    return os.path.join(root, app_name.lower())
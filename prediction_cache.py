@@ -0,0 +1,105 @@
+"""Bounded LRU cache of predict_proba results keyed by the model input vector."""
+import atexit
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from model_registry import get_registry, load_model
+
+
+class PredictionCache:
+    """predict_proba memoized per (model fingerprint, feature tuple).
+
+    Features are canonicalized to floats rounded to float32, which is the
+    precision the trees compare at, so equal answers always hit the same
+    entry. The fingerprint is the model file's sha256 from the registry;
+    when the file changes the registry reloads it and entries for the old
+    fingerprint are dropped. ``attach_file`` keeps the cache across runs.
+    """
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self.path = None
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._fingerprint = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def canonical_key(features):
+        import numpy as np
+        return tuple(np.asarray(features, dtype=np.float32).astype(float).tolist())
+
+    def predict_proba(self, model_path, features):
+        """Class probabilities for one feature vector, from the cache when possible."""
+        import numpy as np
+        model = load_model(model_path)
+        fingerprint = get_registry().fingerprint(model_path)
+        key = self.canonical_key(features)
+        with self._lock:
+            self._check_fingerprint(fingerprint)
+            proba = self._entries.get(key)
+            if proba is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return np.array(proba)
+            self.misses += 1
+        proba = model.predict_proba(np.array([key], dtype=float))[0]
+        with self._lock:
+            if self._fingerprint == fingerprint:
+                self._entries[key] = tuple(proba.tolist())
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return proba
+
+    def _check_fingerprint(self, fingerprint):
+        if fingerprint != self._fingerprint:
+            self._entries.clear()
+            self._fingerprint = fingerprint
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries), 'maxsize': self.maxsize}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def attach_file(self, path):
+        """Load entries saved by an earlier run and save them again at exit."""
+        self.path = path
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            saved = None
+        if saved:
+            with self._lock:
+                self._fingerprint = saved.get('fingerprint')
+                for key, proba in saved.get('entries', [])[-self.maxsize:]:
+                    self._entries[tuple(key)] = tuple(proba)
+        atexit.register(self.save)
+
+    def save(self):
+        if self.path is None:
+            return
+        with self._lock:
+            data = {'fingerprint': self._fingerprint, 'entries': [[list(key), list(proba)] for key, proba in self._entries.items()]}
+        tmp_path = self.path + '.tmp'
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            # the cache is only an optimization; an unwritable cache dir is not an error
+            return False
+        return True
+
+
+_cache = PredictionCache()
+
+def get_prediction_cache():
+    return _cache
@@ -0,0 +1,157 @@
+"""Append-only per-user score history in a fixed-width binary format.
+
+File layout: a 16-byte header (magic, version, record size) followed by
+40-byte records of (timestamp, score, p_low_risk, p_mild, p_moderate_severe)
+as little-endian float64. Appends are one ``write`` of one record under an
+exclusive OS file lock, since the app and the ingest daemon may append to
+the same log from different processes; "last N" reads memory-map the file
+and slice the tail without parsing the rest.
+"""
+import mmap
+import os
+import struct
+import threading
+import time
+
+import numpy as np
+
+if os.name == 'nt':
+    import msvcrt
+else:
+    import fcntl
+
+MAGIC = b'MCSL'
+VERSION = 1
+RECORD_DTYPE = np.dtype([('time', '<f8'), ('score', '<f8'), ('proba', '<f8', (3,))])
+HEADER = struct.Struct('<4sHH8x')
+
+
+def _lock(fd):
+    if os.name == 'nt':
+        # msvcrt locks bytes from the file position; every writer locks the first byte
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+    else:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+
+
+def _unlock(fd):
+    if os.name == 'nt':
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    else:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+class ScoreLog:
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def append(self, score, proba=None, timestamp=None):
+        record = np.zeros(1, dtype=RECORD_DTYPE)
+        record['time'] = time.time() if timestamp is None else timestamp
+        record['score'] = score
+        record['proba'] = np.nan if proba is None else proba
+        with self._lock:
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, 'O_BINARY', 0), 0o644)
+            try:
+                _lock(fd)
+                try:
+                    data = record.tobytes()
+                    size = os.fstat(fd).st_size
+                    if size < HEADER.size:
+                        # a new log, or one whose header write was cut short by a crash
+                        if size:
+                            os.truncate(self.path, 0)
+                        data = HEADER.pack(MAGIC, VERSION, RECORD_DTYPE.itemsize) + data
+                    elif (size - HEADER.size) % RECORD_DTYPE.itemsize:
+                        # every writer holds the lock, so a misaligned size is a record torn by a
+                        # crashed write; drop it so the next one stays aligned
+                        os.truncate(self.path, size - (size - HEADER.size) % RECORD_DTYPE.itemsize)
+                    os.write(fd, data)
+                finally:
+                    _unlock(fd)
+            finally:
+                os.close(fd)
+
+    def create(self, scores, timestamps):
+        """Write a new log holding ``scores`` at once; returns False (writing nothing) if the log exists.
+
+        The records go to a temporary file that is hard-linked into place,
+        which fails instead of overwriting a log another writer created
+        meanwhile, so an interrupted import never leaves a partial log behind.
+        """
+        if os.path.exists(self.path):
+            return False
+        records = np.zeros(len(scores), dtype=RECORD_DTYPE)
+        records['time'] = timestamps
+        records['score'] = scores
+        records['proba'] = np.nan
+        tmp_path = '%s.%d.tmp' % (self.path, os.getpid())
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(HEADER.pack(MAGIC, VERSION, RECORD_DTYPE.itemsize) + records.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            os.link(tmp_path, self.path)
+        except FileExistsError:
+            return False
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return True
+
+    def __len__(self):
+        try:
+            size = os.path.getsize(self.path)
+        except FileNotFoundError:
+            return 0
+        # a partially written last record (e.g. after a crash) is ignored
+        return max(size - HEADER.size, 0) // RECORD_DTYPE.itemsize
+
+    def tail(self, n=None):
+        """Return the last ``n`` records (all when ``n`` is None) as a structured array."""
+        count = len(self)
+        if n is not None:
+            n = min(n, count)
+        else:
+            n = count
+        if n <= 0:
+            return np.zeros(0, dtype=RECORD_DTYPE)
+        with open(self.path, 'rb') as f:
+            magic, version, record_size = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC or version != VERSION or record_size != RECORD_DTYPE.itemsize:
+                raise ValueError('%s is not a version %d score log' % (self.path, VERSION))
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                offset = HEADER.size + (count - n) * RECORD_DTYPE.itemsize
+                return np.frombuffer(mm, dtype=RECORD_DTYPE, count=n, offset=offset).copy()
+
+    def scores(self, n=None):
+        return self.tail(n)['score'].tolist()
+
+
+class ScoreLogDirectory:
+    """One ScoreLog per user, stored as ``<hex(username)>.scores`` in a directory."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._logs = {}
+
+    def path_for(self, user):
+        # hex keeps arbitrary (e.g. Chinese) user names filesystem-safe
+        return os.path.join(self.directory, user.encode('utf-8').hex() + '.scores')
+
+    def get(self, user):
+        log = self._logs.get(user)
+        if log is None:
+            log = self._logs[user] = ScoreLog(self.path_for(user))
+        return log
+
+    def remove(self, user):
+        self._logs.pop(user, None)
+        try:
+            os.remove(self.path_for(user))
+        except FileNotFoundError:
+            pass
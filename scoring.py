@@ -0,0 +1,186 @@
+"""GUI-free feature derivation and scoring shared by the app and the batch CLI."""
+import math
+from collections import OrderedDict
+
+import numpy as np
+
+from fields import (FHT_FIELDS, MOBILITY_FIELDS, OUTPUT_FIELDS, RAW_FIELDS, REQUIRED_FIELDS, RISK_BANDS, SELECT_MASK,
+                    SYMPTOM_FIELDS)
+
+_col = {key: i for i, key in enumerate(RAW_FIELDS)}
+_mobility_cols = [_col[key] for key in MOBILITY_FIELDS]
+_fht_cols = [_col[key] for key in FHT_FIELDS]
+_symptom_cols = [_col[key] for key in SYMPTOM_FIELDS]
+_select_cols = [OUTPUT_FIELDS.index(key) for key in SELECT_MASK]
+_band_names = np.array([RISK_BANDS[i] for i in range(len(RISK_BANDS))])
+# per top class: score offset and how strongly the top-2 margin moves it (see cal_overall_score)
+_score_base = np.array([0 / 3, 1 / 2, 2 / 3])
+_score_divisor = np.array([3.0, 6.0, 3.0])
+
+
+def validate_str(_str):
+    if _str == '-':
+        return '0'
+    else:
+        return _str
+
+def encode_rows(rows):
+    """Parse raw label dicts into an N x 35 float matrix in RAW_FIELDS order.
+
+    Blank and '-' answers become NaN; ``derive_features`` fills and checks
+    them. Returns the matrix and a boolean mask of rows that parsed.
+    """
+    raw = np.array([[str(row.get(key, '')) for key in RAW_FIELDS] for row in rows], dtype=str).reshape(-1, len(RAW_FIELDS))
+    raw = np.char.strip(raw)
+    # np.where widens the dtype: assigning in place would cut 'nan' short in a batch of 1-character answers
+    raw = np.where((raw == '') | (raw == '-'), 'nan', raw)
+    try:
+        return raw.astype(float), np.ones(len(raw), dtype=bool)
+    except ValueError:
+        pass
+    # some answer is not a number: parse column by column, and in the columns that fail
+    # convert each distinct answer once, rejecting only the rows that hold a bad one
+    X = np.empty(raw.shape)
+    parsed = np.ones(len(raw), dtype=bool)
+    for j in range(raw.shape[1]):
+        try:
+            X[:, j] = raw[:, j].astype(float)
+            continue
+        except ValueError:
+            pass
+        values, inverse = np.unique(raw[:, j], return_inverse=True)
+        numbers = np.full(len(values), np.nan)
+        numeric = np.zeros(len(values), dtype=bool)
+        for k, value in enumerate(values):
+            try:
+                numbers[k] = float(value)
+                numeric[k] = True
+            except ValueError:
+                continue
+        X[:, j] = numbers[inverse]
+        parsed &= numeric[inverse]
+    X[~parsed] = np.nan
+    return X, parsed
+
+def derive_features(X):
+    """Columnar label processing over an N x 35 matrix from ``encode_rows``.
+
+    Returns the N x 18 matrix of OUTPUT_FIELDS and a mask of rows whose
+    features are valid (required answers present, positive height and time
+    lapse). Optional answers left blank or '-' count as 0, as in validate_str.
+    """
+    X = np.asarray(X, dtype=float)
+    valid = ~np.isnan(X[:, :len(REQUIRED_FIELDS)]).any(axis=1)
+    valid &= (X[:, _col['Height (cm)']] != 0) & (X[:, _col['Time Lapse (years)']] > 0)
+    optional = np.nan_to_num(X[:, len(REQUIRED_FIELDS):], nan=0.0)
+    out = np.empty((len(X), len(OUTPUT_FIELDS)))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out[:, 0] = X[:, _col['Weight (Kg)']] / X[:, _col['Height (cm)']] ** 2
+    out[:, 1] = X[:, _col['Age (years)']]
+    out[:, 2] = _log(np.where(valid, X[:, _col['Time Lapse (years)']], 1.0))
+    out[:, 3] = X[:, _mobility_cols].max(axis=1)
+    out[:, 4] = X[:, _col['Arm or hand swelling']]
+    out[:, 5] = X[:, _col['Breast swelling']]
+    out[:, 6] = X[:, _col['Toughness or thickness of skin']]
+    out[:, 7] = X[:, _col['Pain, aching, soreness']]
+    out[:, 8] = X[:, _fht_cols].max(axis=1)
+    out[:, 9] = X[:, _col['Pain, aching, soreness']]
+    out[:, 10] = (X[:, _symptom_cols] != 0).sum(axis=1)
+    out[:, 11] = X[:, _col['Chest swelling']]
+    out[:, 12:14] = optional[:, 0:2]                    # Chemotherapy, Radiation
+    out[:, 14] = optional[:, 2] + optional[:, 3]        # SLNB + ALND removed nodes
+    out[:, 15:18] = optional[:, 4:7]                    # Mastectomy, Lumpectomy, Hormonal
+    return out, valid
+
+def _log(values):
+    # math.log over the distinct values: np.log can differ from it in the last
+    # ulp, and time lapses take only a handful of distinct values per cohort
+    uniques, inverse = np.unique(values, return_inverse=True)
+    return np.array([math.log(v) for v in uniques])[inverse.reshape(-1)]
+
+def model_inputs(features):
+    # N x 18 derived features -> N x 11 model matrix
+    return features[:, _select_cols]
+
+def label_processing(labels):
+    # single-patient path (N=1) used by Page2 on submit
+    X, parsed = encode_rows([labels])
+    features, valid = derive_features(X)
+    if not (parsed[0] and valid[0]):
+        raise ValueError('invalid questionnaire answers')
+    return OrderedDict(zip(OUTPUT_FIELDS, features[0]))
+
+def select_features(output_labels):
+    return [output_labels[item] for item in SELECT_MASK]
+
+def cal_overall_score(y_pred):
+    max_index = np.argsort(y_pred)[-1]
+    submax_index = np.argsort(y_pred)[-2]
+    if max_index == 2:
+        base_score = 2 / 3
+        bias = (y_pred[max_index] - y_pred[submax_index]) / 3
+        overall_score = base_score + bias
+    elif max_index == 0:
+        base_score = 0 / 3
+        bias = (y_pred[max_index] - y_pred[submax_index]) / 3
+        overall_score = base_score + bias
+    elif max_index == 1:
+        base_score = 1 / 2
+        bias = (y_pred[max_index] - y_pred[submax_index]) / 6
+        if submax_index == 2:
+            overall_score = base_score + bias
+        else:
+            overall_score = base_score - bias
+    overall_score *= 100
+    return overall_score
+
+def _row_error(x):
+    missing = np.flatnonzero(np.isnan(x[:len(REQUIRED_FIELDS)]))
+    if len(missing):
+        return 'missing required field: %s' % REQUIRED_FIELDS[missing[0]]
+    return 'height and time lapse must be positive'
+
+def overall_scores(y_pred):
+    """Vectorized cal_overall_score over an N x 3 probability matrix.
+
+    Picks the top two classes per row without a full sort, breaking ties
+    towards the higher class index exactly as ``np.argsort(y_pred)[-1]`` and
+    ``[-2]`` do. Returns the 0-100 scores, the risk band of the top class and
+    the top-1/top-2 probability margin.
+    """
+    y_pred = np.asarray(y_pred, dtype=float)
+    rows = np.arange(len(y_pred))
+    last = y_pred.shape[1] - 1
+    # argmax returns the first maximum, so search the reversed columns to get the last one
+    max_index = last - np.argmax(y_pred[:, ::-1], axis=1)
+    rest = y_pred.copy()
+    rest[rows, max_index] = -np.inf
+    submax_index = last - np.argmax(rest[:, ::-1], axis=1)
+    margin = y_pred[rows, max_index] - y_pred[rows, submax_index]
+    base = _score_base[max_index]
+    bias = margin / _score_divisor[max_index]
+    # a 'mild' top class counts downwards when the runner-up is low risk
+    scores = np.where((max_index == 1) & (submax_index != 2), base - bias, base + bias) * 100
+    return scores, _band_names[max_index], margin
+
+def score_batch(model, rows):
+    """Score a list of raw label dicts with one predict_proba call.
+
+    Returns a dict of per-row arrays: ``proba`` (N x 3), ``overall_score``,
+    ``risk_band`` and ``margin`` (NaN/empty for rejected rows) and ``error``
+    (None for rows that were scored).
+    """
+    X, parsed = encode_rows(rows)
+    features, valid = derive_features(X)
+    ok = parsed & valid
+    n = len(rows)
+    result = {'proba': np.full((n, len(RISK_BANDS)), np.nan), 'overall_score': np.full(n, np.nan),
+              'risk_band': np.full(n, '', dtype=_band_names.dtype), 'margin': np.full(n, np.nan),
+              'error': [None] * n}
+    for i in np.flatnonzero(~ok):
+        result['error'][i] = _row_error(X[i]) if parsed[i] else 'non-numeric answer'
+    if ok.any():
+        y_pred = model.predict_proba(model_inputs(features[ok]))
+        result['proba'][ok] = y_pred
+        result['overall_score'][ok], result['risk_band'][ok], result['margin'][ok] = overall_scores(y_pred)
+    return result
@@ -0,0 +1,233 @@
+"""Local HTTP scoring service: ``python -m movecat serve``.
+
+A small asyncio HTTP/1.1 server (standard library only) for EHR
+integration. ``POST /score`` takes one questionnaire in the ``App.labels``
+shape (the 35 raw fields) and returns its class probabilities, overall
+score and risk band; ``GET /metrics`` reports latency percentiles and
+batch sizes; ``GET /health`` answers once the model is loaded.
+
+Requests that arrive together are coalesced by ``MicroBatcher`` into one
+``score_batch`` call: a batch is sent when it holds ``max_batch``
+questionnaires or ``max_latency_ms`` after its first one arrived.
+"""
+import asyncio
+import json
+import time
+from collections import deque
+from http import HTTPStatus
+
+from model_registry import load_model
+from scoring import RISK_BANDS, score_batch
+
+
+class Metrics:
+    """Request latencies and batch sizes over the last ``window`` of each."""
+
+    def __init__(self, window=10000):
+        self.latencies = deque(maxlen=window)
+        self.batch_sizes = deque(maxlen=window)
+        self.requests = 0
+        self.batches = 0
+        self.errors = 0
+
+    def snapshot(self):
+        latencies = sorted(self.latencies)
+        sizes = list(self.batch_sizes)
+        return {'requests': self.requests, 'batches': self.batches, 'errors': self.errors,
+                'latency_ms': {'p50': _percentile(latencies, 50), 'p99': _percentile(latencies, 99),
+                               'max': latencies[-1] if latencies else None},
+                'batch_size': {'mean': sum(sizes) / len(sizes) if sizes else None, 'max': max(sizes, default=None)}}
+
+
+def _percentile(ordered, q):
+    # nearest-rank percentile of an already sorted list
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, max(0, -(-len(ordered) * q // 100) - 1))]
+
+
+class MicroBatcher:
+    """Collects questionnaires from concurrent requests and scores them together.
+
+    The model stays loaded; each batch is one ``score_batch`` call, run on
+    the default executor so the event loop keeps accepting requests
+    meanwhile. Only one batch is scored at a time.
+    """
+
+    def __init__(self, model, max_batch=256, max_latency_ms=5.0, metrics=None):
+        self.model = model
+        self.max_batch = max_batch
+        self.max_latency = max_latency_ms / 1000.0
+        self.metrics = metrics if metrics is not None else Metrics()
+        self._queue = asyncio.Queue()
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def score(self, labels):
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((labels, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_latency
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            rows = [labels for labels, _ in batch]
+            try:
+                result = await loop.run_in_executor(None, score_batch, self.model, rows)
+            except Exception as error:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(error)
+                continue
+            self.metrics.batches += 1
+            self.metrics.batch_sizes.append(len(batch))
+            for i, (_, future) in enumerate(batch):
+                if not future.done():
+                    future.set_result(format_score(result, i))
+
+
+def format_score(result, i):
+    if result['error'][i] is not None:
+        return {'error': result['error'][i]}
+    return {'proba': {label: float(p) for label, p in zip(RISK_BANDS.values(), result['proba'][i])},
+            'overall_score': float(result['overall_score'][i]),
+            'risk_band': str(result['risk_band'][i])}
+
+
+class ScoringService:
+    """The HTTP front end; one instance per listening socket."""
+
+    max_body = 1 << 20
+
+    def __init__(self, model_path, max_batch=256, max_latency_ms=5.0):
+        self.model_path = model_path
+        self.metrics = Metrics()
+        self.batcher = MicroBatcher(load_model(model_path), max_batch, max_latency_ms, self.metrics)
+        self.server = None
+
+    async def start(self, host='127.0.0.1', port=8765):
+        self.batcher.start()
+        self.server = await asyncio.start_server(self.handle_connection, host, port)
+        return self.server.sockets[0].getsockname()[:2]
+
+    async def stop(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        await self.batcher.stop()
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request = await read_request(reader, self.max_body)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                try:
+                    status, payload = await self.dispatch(method, path, body)
+                except Exception as error:
+                    # e.g. the model failed to score: still answer, and count it
+                    self.metrics.errors += 1
+                    status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, {'error': '%s: %s' % (type(error).__name__, error)}
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except ValueError as error:
+            write_response(writer, HTTPStatus.BAD_REQUEST, {'error': str(error)}, False)
+        finally:
+            writer.close()
+
+    async def dispatch(self, method, path, body):
+        if path == '/score' and method == 'POST':
+            start = time.perf_counter()
+            self.metrics.requests += 1
+            try:
+                labels = json.loads(body)
+                if not isinstance(labels, dict):
+                    raise ValueError('expected a JSON object of questionnaire answers')
+            except ValueError as error:
+                self.metrics.errors += 1
+                return HTTPStatus.BAD_REQUEST, {'error': str(error)}
+            response = await self.batcher.score(labels)
+            self.metrics.latencies.append((time.perf_counter() - start) * 1000.0)
+            if 'error' in response:
+                self.metrics.errors += 1
+                return HTTPStatus.UNPROCESSABLE_ENTITY, response
+            return HTTPStatus.OK, response
+        if path == '/metrics' and method == 'GET':
+            return HTTPStatus.OK, self.metrics.snapshot()
+        if path == '/health' and method == 'GET':
+            return HTTPStatus.OK, {'status': 'ok', 'model': self.model_path}
+        if path in ('/score', '/metrics', '/health'):
+            return HTTPStatus.METHOD_NOT_ALLOWED, {'error': 'method not allowed'}
+        return HTTPStatus.NOT_FOUND, {'error': 'not found'}
+
+
+async def read_request(reader, max_body):
+    """One HTTP/1.1 request as (method, path, headers, body); None at end of stream."""
+    line = await reader.readline()
+    if not line:
+        return None
+    try:
+        method, target, _ = line.decode('latin-1').split(' ', 2)
+    except ValueError:
+        raise ValueError('malformed request line')
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get('content-length', 0) or 0)
+    if length > max_body:
+        raise ValueError('request body too large')
+    body = await reader.readexactly(length) if length else b''
+    return method.upper(), target.split('?', 1)[0], headers, body
+
+
+def write_response(writer, status, payload, keep_alive):
+    body = json.dumps(payload).encode('utf-8')
+    head = ['HTTP/1.1 %d %s' % (status, status.phrase), 'Content-Type: application/json',
+            'Content-Length: %d' % len(body), 'Connection: %s' % ('keep-alive' if keep_alive else 'close')]
+    writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + body)
+
+
+def serve(model_path, host='127.0.0.1', port=8765, max_batch=256, max_latency_ms=5.0):
+    """Run the service until interrupted."""
+    async def main():
+        service = ScoringService(model_path, max_batch, max_latency_ms)
+        address = await service.start(host, port)
+        print('serving %s on http://%s:%d' % (model_path, address[0], address[1]), flush=True)
+        try:
+            await service.server.serve_forever()
+        finally:
+            await service.stop()
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
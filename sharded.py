@@ -0,0 +1,159 @@
+"""Multi-process scoring of large cohort files: ``movecat score --workers N``.
+
+The parent process only splits the input into chunks of raw records; the
+workers of a process pool (each loading the model once) parse, score and
+format a chunk into output text. Chunks are written back in input order,
+and at most ``2 * workers`` are in flight, so memory stays bounded
+whatever the file size.
+
+With a checkpoint file, the byte offsets of the input and the output
+after every written chunk are recorded. ``resume`` truncates the output to
+the last recorded offset and continues from the matching input offset,
+so a killed job only redoes the chunks that were in flight.
+"""
+import csv
+import io
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+_model = None
+
+
+def _init_worker(model_path):
+    global _model
+    from model_registry import load_model
+    _model = load_model(model_path)
+
+def _score_chunk(rows_before, header, records, in_fmt, out_fmt, batch_size):
+    from movecat import ResultWriter, iter_rows, score_stream
+    text = ''.join([header] + records) if in_fmt == 'csv' else ''.join(records)
+    out = io.StringIO(newline='')
+    n_rows, n_errors = score_stream(iter_rows(io.StringIO(text, newline=''), in_fmt), ResultWriter(out, out_fmt, header=False),
+                                    _model, batch_size, rows_before)
+    return out.getvalue().encode('utf-8'), n_rows, n_errors
+
+
+def iter_records(f, fmt, chunk_rows):
+    """Chunks of raw records from a binary file, as (end offset, [record text]).
+
+    CSV records may span lines inside quotes, so lines are joined until
+    their quotes balance; JSONL records are the non-blank lines. Bytes
+    that are not UTF-8 are replaced rather than raised on, so a bad line
+    becomes a row error (as malformed JSON does in ``iter_rows``) instead
+    of stopping the job at the same chunk on every resume.
+    """
+    chunk = []
+    pending = b''
+    while True:
+        line = f.readline()
+        if not line:
+            break
+        if fmt == 'csv':
+            pending += line
+            if pending.count(b'"') % 2:
+                continue
+            line, pending = pending, b''
+        # blank lines are not rows for csv.DictReader either
+        if not line.strip():
+            continue
+        chunk.append(line.decode('utf-8', 'replace'))
+        if len(chunk) >= chunk_rows:
+            yield f.tell(), chunk
+            chunk = []
+    if pending:
+        chunk.append(pending.decode('utf-8', 'replace'))
+    if chunk:
+        yield f.tell(), chunk
+
+
+class Checkpoint:
+    """Progress of one sharded job, rewritten atomically after every chunk."""
+
+    def __init__(self, path, job):
+        self.path = path
+        self.job = job
+        self.state = {'input_offset': None, 'output_bytes': 0, 'rows': 0, 'errors': 0}
+
+    def load(self):
+        """Saved progress of the same job, or None."""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if saved.get('job') != self.job:
+            raise ValueError('checkpoint %s belongs to a different job (input file, output file or format changed)' % self.path)
+        self.state = saved['state']
+        return self.state
+
+    def save(self):
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'job': self.job, 'state': self.state}, f)
+        os.replace(tmp_path, self.path)
+
+
+def score_file(input_path, output_path, in_fmt, out_fmt, model_path, workers, chunk_rows=50000, batch_size=4096,
+               checkpoint_path=None, resume=False):
+    """Score ``input_path`` into ``output_path`` on ``workers`` processes; returns (rows, errors)."""
+    from movecat import OUTPUT_FIELDS
+    checkpoint = None
+    if checkpoint_path:
+        stat = os.stat(input_path)
+        job = {'input': os.path.abspath(input_path), 'input_size': stat.st_size, 'input_mtime': stat.st_mtime,
+               'output': os.path.abspath(output_path), 'in_fmt': in_fmt, 'out_fmt': out_fmt}
+        checkpoint = Checkpoint(checkpoint_path, job)
+    state = checkpoint.load() if checkpoint is not None and resume else None
+
+    with open(input_path, 'rb') as src:
+        header = ''
+        if in_fmt == 'csv':
+            header = src.readline().decode('utf-8', 'replace')
+        if state is not None and state['input_offset'] is not None:
+            src.seek(state['input_offset'])
+            dst = open(output_path, 'r+b')
+            dst.truncate(state['output_bytes'])
+            dst.seek(state['output_bytes'])
+            n_rows, n_errors = state['rows'], state['errors']
+        else:
+            dst = open(output_path, 'wb')
+            if out_fmt == 'csv':
+                text = io.StringIO(newline='')
+                csv.DictWriter(text, fieldnames=OUTPUT_FIELDS).writeheader()
+                dst.write(text.getvalue().encode('utf-8'))
+            n_rows = n_errors = 0
+            if checkpoint is not None:
+                dst.flush()
+                checkpoint.state = {'input_offset': src.tell(), 'output_bytes': dst.tell(), 'rows': 0, 'errors': 0}
+                checkpoint.save()
+        try:
+            with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(model_path,)) as pool:
+                in_flight = deque()
+                rows_submitted = n_rows
+
+                def write_oldest():
+                    nonlocal n_rows, n_errors
+                    offset, future = in_flight.popleft()
+                    data, rows, errors = future.result()
+                    dst.write(data)
+                    n_rows += rows
+                    n_errors += errors
+                    if checkpoint is not None:
+                        dst.flush()
+                        os.fsync(dst.fileno())
+                        checkpoint.state = {'input_offset': offset, 'output_bytes': dst.tell(), 'rows': n_rows, 'errors': n_errors}
+                        checkpoint.save()
+
+                for offset, records in iter_records(src, in_fmt, chunk_rows):
+                    in_flight.append((offset, pool.submit(_score_chunk, rows_submitted, header, records, in_fmt, out_fmt, batch_size)))
+                    rows_submitted += len(records)
+                    while len(in_flight) >= 2 * workers:
+                        write_oldest()
+                while in_flight:
+                    write_oldest()
+        finally:
+            dst.close()
+    return n_rows, n_errors
+
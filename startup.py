@@ -0,0 +1,149 @@
+"""Cold-start helpers: modules imported on first use, a background warm-up and --profile-startup timings."""
+import builtins
+import importlib
+import importlib.util
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+
+class StartupProfiler:
+    """Per-phase and per-import wall times since the profiler was enabled.
+
+    Import times are taken by wrapping ``builtins.__import__`` and are only
+    recorded for import statements that actually loaded new modules; like
+    ``python -X importtime`` each entry has a cumulative and a self time.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.t0 = time.perf_counter()
+        self.phases = []
+        self.imports = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def enable(self):
+        if self.enabled:
+            return
+        self.enabled = True
+        self.t0 = time.perf_counter()
+        original = builtins.__import__
+
+        def timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+            stack = getattr(self._local, 'stack', None)
+            if stack is None:
+                stack = self._local.stack = []
+            loaded = len(sys.modules)
+            stack.append(0.0)
+            start = time.perf_counter()
+            try:
+                return original(name, globals, locals, fromlist, level)
+            finally:
+                elapsed = time.perf_counter() - start
+                children = stack.pop()
+                if len(sys.modules) > loaded:
+                    if level:
+                        name = importlib.util.resolve_name('.' * level + name, (globals or {}).get('__package__'))
+                    self._record_import(name, elapsed, elapsed - children)
+                    if stack:
+                        stack[-1] += elapsed
+
+        builtins.__import__ = timed_import
+
+    def _record_import(self, name, cumulative, own):
+        with self._lock:
+            total = self.imports.setdefault(name, [0.0, 0.0])
+            total[0] += cumulative
+            total[1] += own
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            if self.enabled:
+                with self._lock:
+                    self.phases.append((start - self.t0, time.perf_counter() - start, threading.current_thread().name, name))
+
+    def mark(self, name):
+        if self.enabled:
+            with self._lock:
+                self.phases.append((time.perf_counter() - self.t0, 0.0, threading.current_thread().name, name))
+
+    def report(self, file=None, top=25):
+        file = sys.stderr if file is None else file
+        with self._lock:
+            phases = sorted(self.phases)
+            imports = sorted(self.imports.items(), key=lambda item: -item[1][0])[:top]
+        print('phase                                      start(s)  took(s)  thread', file=file)
+        for start, took, thread, name in phases:
+            print('%-42s %8.3f %8.3f  %s' % (name, start, took, thread), file=file)
+        print('\nimport                                     cumul(s)   self(s)', file=file)
+        for name, (cumulative, own) in imports:
+            print('%-42s %8.3f %9.3f' % (name, cumulative, own), file=file)
+
+
+profiler = StartupProfiler()
+
+
+class LazyModule:
+    """Stand-in for a module that is imported on first attribute access.
+
+    ``before`` runs once beforehand, e.g. to register fonts ahead of the
+    first matplotlib import.
+    """
+
+    def __init__(self, name, before=None):
+        self._lazy_name = name
+        self._lazy_before = before
+        self._lazy_module = None
+
+    def _load(self):
+        if self._lazy_module is None:
+            if self._lazy_before is not None:
+                self._lazy_before()
+            with profiler.phase('load ' + self._lazy_name):
+                self._lazy_module = importlib.import_module(self._lazy_name)
+        return self._lazy_module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+
+_font_lock = threading.Lock()
+_fonts = set()
+
+
+def register_font(path):
+    """Add a font file to matplotlib's font manager once per process."""
+    with _font_lock:
+        if path in _fonts:
+            return
+        with profiler.phase('register font'):
+            from matplotlib import font_manager
+            font_manager.fontManager.addfont(path)
+        _fonts.add(path)
+
+
+class Warmup(threading.Thread):
+    """Runs slow start-up steps (imports, model load) off the Tk main loop.
+
+    A failing step is only remembered; the code that needs it later runs it
+    again on demand and reports the error there.
+    """
+
+    def __init__(self, steps):
+        super().__init__(name='warm-up', daemon=True)
+        self.steps = steps
+        self.errors = []
+
+    def run(self):
+        for name, step in self.steps:
+            try:
+                with profiler.phase('warm-up: ' + name):
+                    step()
+            except Exception as e:
+                self.errors.append((name, e))
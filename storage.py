@@ -0,0 +1,152 @@
+"""SQLite-backed storage for accounts and saved questionnaires.
+
+Score history lives next to the database in per-user append-only logs
+(see score_log.py).
+"""
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS users (name TEXT PRIMARY KEY, password TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS suggestions (user TEXT PRIMARY KEY, data TEXT NOT NULL, updated REAL NOT NULL);
+"""
+
+
+def _load_json(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as file:
+        return json.load(file, object_pairs_hook=OrderedDict)
+
+
+class RecordStore:
+    """One row per user and per saved questionnaire, plus a score log per user.
+
+    The database runs in WAL mode so several app windows (or the batch tools)
+    can read while one of them writes, and every save touches only the rows
+    of the current user.
+    """
+
+    def __init__(self, db_path, score_dir=None):
+        self.db_path = db_path
+        if score_dir is None:
+            score_dir = os.path.join(os.path.dirname(os.path.abspath(db_path)), 'scores')
+        self.score_dir = score_dir
+        self._score_logs = None
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, timeout=10, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._migrate_score_table()
+
+    @property
+    def score_logs(self):
+        # score_log needs numpy; opening the store (e.g. for the login screen) should not
+        if self._score_logs is None:
+            from score_log import ScoreLogDirectory
+            self._score_logs = ScoreLogDirectory(self.score_dir)
+        return self._score_logs
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _write(self, statements):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for sql, params in statements:
+                    self._conn.execute(sql, params)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    # accounts
+    def get_password(self, user):
+        rows = self._query("SELECT password FROM users WHERE name = ?", (user,))
+        return rows[0][0] if rows else None
+
+    def add_user(self, user, password):
+        try:
+            self._write([("INSERT INTO users (name, password) VALUES (?, ?)", (user, password))])
+        except sqlite3.IntegrityError:
+            return False
+        return True
+
+    def delete_user(self, user):
+        self._write([("DELETE FROM users WHERE name = ?", (user,)),
+                     ("DELETE FROM suggestions WHERE user = ?", (user,))])
+        self.score_logs.remove(user)
+
+    # saved questionnaire answers
+    def load_suggestions(self, user):
+        rows = self._query("SELECT data FROM suggestions WHERE user = ?", (user,))
+        if not rows:
+            return None
+        return json.loads(rows[0][0], object_pairs_hook=OrderedDict)
+
+    def save_suggestions(self, user, suggestions):
+        self._write([("INSERT OR REPLACE INTO suggestions (user, data, updated) VALUES (?, ?, ?)",
+                      (user, json.dumps(suggestions), time.time()))])
+
+    # score history
+    def append_score(self, user, score, proba=None, timestamp=None):
+        self.score_logs.get(user).append(score, proba, timestamp)
+
+    def load_scores(self, user, last=None):
+        return self.score_logs.get(user).scores(last)
+
+    def _import_scores(self, scores, source):
+        # one new log per user, written whole; a user that already has a log was imported
+        # before an interrupted migration, so a migration can simply be rerun; the skip is
+        # reported since the log could also have been started by another writer
+        by_user = OrderedDict()
+        for user, score, timestamp in scores:
+            by_user.setdefault(user, []).append((score, timestamp))
+        for user, rows in by_user.items():
+            if not self.score_logs.get(user).create([score for score, _ in rows], [timestamp for _, timestamp in rows]):
+                print('%d scores of user %r in %s not imported: the user already has a score log (%s)'
+                      % (len(rows), user, source, self.score_logs.path_for(user)), file=sys.stderr)
+
+    def _migrate_score_table(self):
+        # databases created before the score logs kept scores in a table; the table is only
+        # dropped once every log is written
+        if not self._query("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'scores'"):
+            return
+        self._import_scores(self._query("SELECT user, score, created FROM scores ORDER BY id"), 'the scores table of %s' % self.db_path)
+        self._write([("DROP TABLE IF EXISTS scores", ())])
+
+    def migrate_from_json(self, user_data_path, record_data_path):
+        """Import data/user_data.json and data/user_record.json once.
+
+        The JSON files are left in place; a marker in the meta table keeps the
+        import from running again. The score logs are written before the
+        marker is committed, so an interrupted import runs again in full.
+        """
+        if self._query("SELECT 1 FROM meta WHERE key = 'json_migrated'"):
+            return False
+        statements, scores = [], []
+        for user, password in _load_json(user_data_path).items():
+            statements.append(("INSERT OR IGNORE INTO users (name, password) VALUES (?, ?)", (user, password)))
+        now = time.time()
+        for user, record in _load_json(record_data_path).items():
+            if record.get('suggestions') is not None:
+                statements.append(("INSERT OR IGNORE INTO suggestions (user, data, updated) VALUES (?, ?, ?)",
+                                   (user, json.dumps(record['suggestions']), now)))
+            scores.extend((user, score, now) for score in record.get('score_list', []))
+        self._import_scores(scores, record_data_path)
+        statements.append(("INSERT OR IGNORE INTO meta (key, value) VALUES ('json_migrated', ?)", (str(now),)))
+        self._write(statements)
+        return True
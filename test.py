@@ -3,8 +3,8 @@ from tkinter import ttk
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import numpy as np
-import pickle
 import os
+from model_registry import load_model
 
 class Application(tk.Frame):
     def __init__(self, master=None):
@@ -19,8 +19,7 @@ class Application(tk.Frame):
         data_select = np.array([[self.master.parent.output_labels[item] for item in select_mask]], dtype=float)
         basepath = os.getcwd()
         model_path = os.path.join(basepath, 'models' , 'GBT.pkl')
-        with open(model_path, 'rb') as f:
-            model = pickle.load(f)
+        model = load_model(model_path)
 
         self.y_pred = model.predict_proba(data_select).squeeze()
 
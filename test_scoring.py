@@ -0,0 +1,60 @@
+"""overall_scores must agree with cal_overall_score row by row: ``python -m unittest test_scoring``."""
+import itertools
+import unittest
+
+import numpy as np
+
+from fields import RISK_BANDS
+from scoring import cal_overall_score, overall_scores
+
+
+def scalar_scores(y_pred):
+    """Score, band and margin of each row with the scalar cal_overall_score."""
+    scores, bands, margins = [], [], []
+    for row in y_pred:
+        order = np.argsort(row)
+        scores.append(cal_overall_score(row))
+        bands.append(RISK_BANDS[order[-1]])
+        margins.append(row[order[-1]] - row[order[-2]])
+    return np.array(scores), np.array(bands), np.array(margins)
+
+
+class OverallScoresTest(unittest.TestCase):
+
+    def assert_matches_scalar(self, y_pred):
+        scores, bands, margins = overall_scores(y_pred)
+        expected_scores, expected_bands, expected_margins = scalar_scores(y_pred)
+        np.testing.assert_array_equal(scores, expected_scores)
+        np.testing.assert_array_equal(bands, expected_bands)
+        np.testing.assert_array_equal(margins, expected_margins)
+
+    def test_random_probabilities(self):
+        rng = np.random.default_rng(0)
+        self.assert_matches_scalar(rng.dirichlet(np.ones(3), size=5000))
+
+    def test_random_unnormalized_rows(self):
+        rng = np.random.default_rng(1)
+        self.assert_matches_scalar(rng.uniform(-1, 2, size=(5000, 3)))
+
+    def test_ties(self):
+        # every row built from at most two distinct values, so the top two are often tied
+        values = [0.0, 0.2, 0.4, 0.5]
+        rows = np.array(list(itertools.product(values, repeat=3)))
+        self.assert_matches_scalar(rows)
+
+    def test_coarse_grid_ties(self):
+        rng = np.random.default_rng(2)
+        self.assert_matches_scalar(rng.integers(0, 4, size=(5000, 3)) / 4)
+
+    def test_degenerate_rows(self):
+        rows = np.array([[1 / 3, 1 / 3, 1 / 3], [0.0, 0.0, 0.0], [1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.0, 0.0, 1.0],
+                         [0.5, 0.5, 0.0], [0.0, 0.5, 0.5], [0.5, 0.0, 0.5], [1.0, 1.0, 1.0]])
+        self.assert_matches_scalar(rows)
+
+    def test_empty_batch(self):
+        scores, bands, margins = overall_scores(np.empty((0, 3)))
+        self.assertEqual((len(scores), len(bands), len(margins)), (0, 0, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
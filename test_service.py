@@ -0,0 +1,101 @@
+"""The HTTP scoring service against a stub client: ``python -m unittest test_service``."""
+import asyncio
+import json
+import unittest
+
+import numpy as np
+
+from fields import RAW_FIELDS
+from model_registry import load_model
+from paths import model_path
+from scoring import score_batch
+from service import ScoringService
+
+
+def questionnaire(**answers):
+    labels = {key: '1' for key in RAW_FIELDS}
+    labels.update(answers)
+    return labels
+
+
+async def request(address, method, path, body=None):
+    """One HTTP/1.1 request on a fresh connection; returns (status, decoded JSON body)."""
+    reader, writer = await asyncio.open_connection(*address)
+    data = b'' if body is None else body if isinstance(body, bytes) else json.dumps(body).encode('utf-8')
+    writer.write(('%s %s HTTP/1.1\r\nHost: test\r\nContent-Length: %d\r\nConnection: close\r\n\r\n'
+                  % (method, path, len(data))).encode('latin-1') + data)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, payload = response.partition(b'\r\n\r\n')
+    return int(head.split(b' ', 2)[1]), json.loads(payload)
+
+
+class FailingModel:
+    def predict_proba(self, X):
+        raise RuntimeError('model unavailable')
+
+
+class ScoringServiceTest(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        # a long batching window so that concurrent requests are sure to share a batch
+        self.service = ScoringService(model_path(), max_batch=64, max_latency_ms=50.0)
+        self.address = await self.service.start('127.0.0.1', 0)
+
+    async def asyncTearDown(self):
+        await self.service.stop()
+
+    async def test_concurrent_scores_are_batched(self):
+        rows = [questionnaire(**{'Age (years)': str(30 + i)}) for i in range(20)]
+        responses = await asyncio.gather(*[request(self.address, 'POST', '/score', row) for row in rows])
+        expected = score_batch(load_model(model_path()), rows)
+        for i, (status, payload) in enumerate(responses):
+            self.assertEqual(status, 200)
+            self.assertAlmostEqual(payload['overall_score'], expected['overall_score'][i])
+            np.testing.assert_allclose(list(payload['proba'].values()), expected['proba'][i])
+        metrics = self.service.metrics.snapshot()
+        self.assertEqual(metrics['requests'], 20)
+        self.assertLess(metrics['batches'], 20)
+        self.assertGreater(metrics['batch_size']['max'], 1)
+
+    async def test_metrics_and_health(self):
+        await request(self.address, 'POST', '/score', questionnaire())
+        status, metrics = await request(self.address, 'GET', '/metrics')
+        self.assertEqual(status, 200)
+        self.assertEqual((metrics['requests'], metrics['batches'], metrics['errors']), (1, 1, 0))
+        self.assertIsNotNone(metrics['latency_ms']['p50'])
+        status, health = await request(self.address, 'GET', '/health')
+        self.assertEqual((status, health['status']), (200, 'ok'))
+
+    async def test_malformed_body_is_400(self):
+        status, payload = await request(self.address, 'POST', '/score', b'{not json')
+        self.assertEqual(status, 400)
+        status, payload = await request(self.address, 'POST', '/score', [1, 2])
+        self.assertEqual(status, 400)
+        self.assertIn('error', payload)
+        self.assertEqual(self.service.metrics.errors, 2)
+
+    async def test_invalid_answers_are_422(self):
+        labels = questionnaire()
+        del labels['Age (years)']
+        status, payload = await request(self.address, 'POST', '/score', labels)
+        self.assertEqual(status, 422)
+        self.assertIn('Age', payload['error'])
+        status, payload = await request(self.address, 'POST', '/score', questionnaire(**{'Age (years)': 'old'}))
+        self.assertEqual((status, payload['error']), (422, 'non-numeric answer'))
+
+    async def test_unknown_paths_and_methods(self):
+        self.assertEqual((await request(self.address, 'GET', '/nowhere'))[0], 404)
+        self.assertEqual((await request(self.address, 'GET', '/score'))[0], 405)
+
+    async def test_model_failure_is_500(self):
+        self.service.batcher.model = FailingModel()
+        status, payload = await request(self.address, 'POST', '/score', questionnaire())
+        self.assertEqual(status, 500)
+        self.assertIn('model unavailable', payload['error'])
+        self.assertEqual(self.service.metrics.errors, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
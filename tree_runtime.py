@@ -0,0 +1,207 @@
+"""sklearn-free runtime for the gradient-boosted tree model.
+
+``export_gbt`` flattens a fitted GradientBoostingClassifier into a versioned
+``.npz`` of contiguous node arrays; ``TreeEnsemble`` loads it and predicts
+with NumPy alone, traversing every tree for a whole batch at once.
+
+Format (version 1), all trees concatenated in stage-major order:
+
+    feature, threshold, left, right   per node; left == -1 marks a leaf and
+                                      children are global node indices
+    value                             per node; the leaf's raw contribution
+    cover                             per node; weighted training samples
+    tree_offset                       first node of each tree (n_trees + 1)
+    tree_class                        class column each tree adds to
+    init_raw                          raw prediction before the first stage
+    learning_rate, max_depth, n_features, classes, kind, format_version
+"""
+import numpy as np
+
+FORMAT_VERSION = 1
+KINDS = ('multinomial', 'binomial')
+
+
+def export_gbt(model, path):
+    """Write a fitted GradientBoostingClassifier to ``path`` (.npz)."""
+    classes = np.asarray(model.classes_)
+    n_features = model.n_features_in_
+    estimators = model.estimators_
+    kind = 'multinomial' if len(classes) > 2 else 'binomial'
+    if model.init_ == 'zero':
+        init_raw = np.zeros(estimators.shape[1])
+    else:
+        # the init estimator is a constant predictor (class priors); evaluate it once
+        probas = model.init_.predict_proba(np.zeros((1, n_features)))[0]
+        eps = np.finfo(np.float32).eps
+        probas = np.clip(probas, eps, 1 - eps)
+        if kind == 'multinomial':
+            init_raw = np.log(probas).astype(np.float64)
+        else:
+            init_raw = np.log(probas[1:] / probas[:1]).astype(np.float64)
+
+    feature, threshold, left, right, value, cover = [], [], [], [], [], []
+    tree_offset, tree_class = [0], []
+    max_depth = 0
+    for stage in estimators:
+        for k, estimator in enumerate(stage):
+            tree = estimator.tree_
+            offset = tree_offset[-1]
+            is_leaf = tree.children_left == -1
+            feature.append(np.where(is_leaf, -1, tree.feature))
+            threshold.append(np.where(is_leaf, 0.0, tree.threshold))
+            left.append(np.where(is_leaf, -1, tree.children_left + offset))
+            right.append(np.where(is_leaf, -1, tree.children_right + offset))
+            value.append(tree.value[:, 0, 0])
+            cover.append(tree.weighted_n_node_samples)
+            tree_offset.append(offset + tree.node_count)
+            tree_class.append(k)
+            max_depth = max(max_depth, tree.max_depth)
+
+    np.savez(path,
+             format_version=np.int32(FORMAT_VERSION),
+             kind=np.str_(kind),
+             classes=classes,
+             n_features=np.int32(n_features),
+             learning_rate=np.float64(model.learning_rate),
+             max_depth=np.int32(max_depth),
+             init_raw=init_raw,
+             feature=np.concatenate(feature).astype(np.int32),
+             threshold=np.concatenate(threshold).astype(np.float64),
+             left=np.concatenate(left).astype(np.int32),
+             right=np.concatenate(right).astype(np.int32),
+             value=np.concatenate(value).astype(np.float64),
+             cover=np.concatenate(cover).astype(np.float64),
+             tree_offset=np.asarray(tree_offset, dtype=np.int64),
+             tree_class=np.asarray(tree_class, dtype=np.int32))
+
+
+class TreeEnsemble:
+    """Batch predictor over the arrays written by ``export_gbt``.
+
+    Mirrors sklearn: inputs are rounded to float32 before the split
+    comparisons (``x <= threshold`` goes left), stage outputs are scaled by
+    the learning rate and added to ``init_raw``, and probabilities come from
+    a softmax (multinomial) or sigmoid (binomial).
+    """
+
+    def __init__(self, arrays):
+        version = int(arrays['format_version'])
+        if version != FORMAT_VERSION:
+            raise ValueError('unsupported tree model format version %d (expected %d)' % (version, FORMAT_VERSION))
+        self.kind = str(arrays['kind'])
+        if self.kind not in KINDS:
+            raise ValueError('unsupported tree model kind %r' % self.kind)
+        self.classes_ = np.asarray(arrays['classes'])
+        self.n_features_in_ = int(arrays['n_features'])
+        self.learning_rate = float(arrays['learning_rate'])
+        self.max_depth = int(arrays['max_depth'])
+        self.init_raw = np.asarray(arrays['init_raw'], dtype=np.float64)
+        self.feature = np.asarray(arrays['feature'])
+        self.threshold = np.asarray(arrays['threshold'])
+        self.left = np.asarray(arrays['left'])
+        self.right = np.asarray(arrays['right'])
+        self.value = np.asarray(arrays['value'])
+        self.cover = np.asarray(arrays['cover'])
+        self.tree_offset = np.asarray(arrays['tree_offset'])
+        self.tree_class = np.asarray(arrays['tree_class'])
+        self.roots = self.tree_offset[:-1]
+        self._compile()
+
+    def _compile(self):
+        # Level tables: _levels[d] is n_trees x 2**d, the node each root-to-depth-d
+        # path ends at (leaves point at themselves, so shallow leaves repeat).
+        left = np.where(self.left == -1, np.arange(len(self.left)), self.left)
+        right = np.where(self.right == -1, np.arange(len(self.right)), self.right)
+        self._levels = [self.roots[:, None]]
+        for _ in range(self.max_depth):
+            nodes = self._levels[-1]
+            self._levels.append(np.stack([left[nodes], right[nodes]], axis=2).reshape(self.n_trees, -1))
+        self._leaf_table = self._levels[-1].ravel()
+        self._leaf_offset = np.arange(self.n_trees) * self._levels[-1].shape[1]
+        # distinct (feature, threshold) tests; each node refers to one of them
+        is_split = self.feature != -1
+        tests = np.stack([self.feature[is_split], self.threshold[is_split]], axis=1)
+        tests, index = np.unique(tests, axis=0, return_inverse=True)
+        self._test_feature = tests[:, 0].astype(np.intp)
+        self._test_threshold = tests[:, 1]
+        self._test_of_node = np.zeros(len(self.feature), dtype=np.intp)
+        self._test_of_node[is_split] = index.ravel()
+        # sums each tree's leaf value into its class column
+        self._class_matrix = np.zeros((self.n_trees, len(self.init_raw)))
+        self._class_matrix[np.arange(self.n_trees), self.tree_class] = 1.0
+        n_classes = len(self.init_raw)
+        self._stage_major = np.array_equal(self.tree_class, np.tile(np.arange(n_classes), self.n_trees // n_classes))
+
+    @classmethod
+    def load(cls, path_or_file):
+        with np.load(path_or_file, allow_pickle=False) as arrays:
+            return cls({key: arrays[key] for key in arrays.files})
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    def apply(self, X, chunk_size=2048):
+        """Leaf node index (global) reached in every tree: an N x n_trees array."""
+        X = self._check_input(X)
+        leaves = np.empty((len(X), self.n_trees), dtype=np.intp)
+        for start in range(0, len(X), chunk_size):
+            leaves[start:start + chunk_size] = self._apply_chunk(X[start:start + chunk_size])
+        return leaves
+
+    def _apply_chunk(self, X):
+        # Every distinct split test is evaluated once per sample; the trees are
+        # then walked level by level as a path code (bit per level, 1 = right),
+        # picking each sample's test column from the level table.
+        passed = X[:, self._test_feature] <= self._test_threshold
+        path = np.zeros((len(X), self.n_trees), dtype=np.int32)
+        for nodes in self._levels[:-1]:
+            tests = self._test_of_node[nodes]
+            go_right = ~passed[:, tests[:, 0]]
+            for k in range(1, nodes.shape[1]):
+                np.copyto(go_right, ~passed[:, tests[:, k]], where=path == k)
+            path = path * 2 + go_right
+        return self._leaf_table[self._leaf_offset + path]
+
+    def decision_function(self, X, chunk_size=2048):
+        X = self._check_input(X)
+        raw = np.empty((len(X), len(self.init_raw)))
+        for start in range(0, len(X), chunk_size):
+            leaves = self._apply_chunk(X[start:start + chunk_size])
+            if self._stage_major:
+                # a fixed summation order per row: unlike a BLAS matmul, the result
+                # does not depend on which other rows share the batch
+                raw[start:start + chunk_size] = self.value[leaves].reshape(len(leaves), -1, raw.shape[1]).sum(axis=1)
+            else:
+                raw[start:start + chunk_size] = self.value[leaves] @ self._class_matrix
+        raw *= self.learning_rate
+        raw += self.init_raw
+        return raw
+
+    def predict_proba(self, X):
+        raw = self.decision_function(X)
+        if self.kind == 'binomial':
+            p = 1.0 / (1.0 + np.exp(-raw[:, 0]))
+            return np.column_stack([1.0 - p, p])
+        raw = raw - raw.max(axis=1, keepdims=True)
+        proba = np.exp(raw)
+        return proba / proba.sum(axis=1, keepdims=True)
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+    def _check_input(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError('expected an N x %d feature matrix, got shape %s' % (self.n_features_in_, X.shape))
+        # sklearn trees compare float32 inputs against float64 thresholds
+        return X.astype(np.float32).astype(np.float64)
+
+
+def load_ensemble(path_or_file):
+    return TreeEnsemble.load(path_or_file)
+
+
+def max_abs_difference(model, ensemble, X):
+    """Largest predict_proba difference between a fitted sklearn model and its export."""
+    return float(np.max(np.abs(model.predict_proba(X) - ensemble.predict_proba(X)))) if len(X) else 0.0
@@ -0,0 +1,63 @@
+"""What-if sensitivity: every single-step change of one questionnaire, scored in one model call."""
+import numpy as np
+
+from fields import FIELD_RANGES, RAW_FIELDS, REQUIRED_FIELDS
+from scoring import derive_features, encode_rows, model_inputs, overall_scores
+
+_low = np.array([low for low, high in FIELD_RANGES], dtype=float)
+_high = np.array([high for low, high in FIELD_RANGES], dtype=float)
+
+
+def perturbations(x):
+    """All answers one step (+1 or -1) away from the raw answer vector ``x``.
+
+    Blank optional answers count as 0, as in scoring; steps that leave the
+    field's FIELD_RANGES are skipped. Returns the changed field index, its
+    new value and the M x 35 matrix of perturbed answer vectors.
+    """
+    x = np.asarray(x, dtype=float).copy()
+    optional = np.arange(len(x)) >= len(REQUIRED_FIELDS)
+    x[optional & np.isnan(x)] = 0.0
+    fields = np.repeat(np.arange(len(x)), 2)
+    values = x[fields] + np.tile([-1.0, 1.0], len(x))
+    keep = ~np.isnan(values) & (values >= _low[fields]) & (values <= _high[fields])
+    fields, values = fields[keep], values[keep]
+    X = np.repeat(x[None, :], len(fields), axis=0)
+    X[np.arange(len(fields)), fields] = values
+    return fields, values, X
+
+
+class Sensitivity:
+    """Scores of the single-step what-ifs around one questionnaire.
+
+    ``score`` is the overall score of the answers themselves; ``field``,
+    ``value``, ``new_score`` and ``delta`` are parallel arrays over the
+    perturbations that give valid answers, ranked by ``|delta|``.
+    """
+
+    def __init__(self, model, labels):
+        X, parsed = encode_rows([labels])
+        if not parsed[0]:
+            raise ValueError('non-numeric answer')
+        fields, values, perturbed = perturbations(X[0])
+        # blank optional answers as the model sees them (0)
+        self.answers = np.where(np.isnan(X[0]) & (np.arange(len(X[0])) >= len(REQUIRED_FIELDS)), 0.0, X[0])
+        # the answers themselves go in row 0 so everything is one predict_proba call
+        features, valid = derive_features(np.vstack([self.answers, perturbed]))
+        if not valid[0]:
+            raise ValueError('invalid questionnaire answers')
+        keep = valid[1:]
+        scores, _, _ = overall_scores(model.predict_proba(model_inputs(features[np.r_[True, keep]])))
+        self.score = float(scores[0])
+        delta = scores[1:] - self.score
+        order = np.argsort(-np.abs(delta), kind='stable')
+        self.field = fields[keep][order]
+        self.value = values[keep][order]
+        self.new_score = scores[1:][order]
+        self.delta = delta[order]
+
+    def field_name(self, i):
+        return RAW_FIELDS[self.field[i]]
+
+    def __len__(self):
+        return len(self.field)
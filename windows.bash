@@ -1,2 +1,2 @@
 # /bin/bash
-pyinstaller --noconsole --add-data "models;models" --add-data "data;data" --collect-all customtkinter --collect-all sklearn --collect-all matplotlib .\diagnosis.py --noconfirm
\ No newline at end of file
+pyinstaller --noconsole --add-data "models;models" --add-data "data;data" --collect-all customtkinter --collect-all matplotlib --hidden-import charts --hidden-import whatif --hidden-import attribution .\diagnosis.py --noconfirm
\ No newline at end of file